@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Content-hashed asset output and assets-manifest.json bookkeeping.
+
+With hashing enabled the converters write e.g. `scene.json` as
+`scene.3f2a9c1b0d4e.json`, so every deploy of changed content gets a new URL
+and the files can be served with immutable cache headers. The manifest maps
+each logical name to its current file:
+
+{
+  "scene.json": {
+    "file": "scene.3f2a9c1b0d4e.json",
+    "hash": "3f2a9c1b0d4e...",
+    "bytes": 1257586,
+    "triangles": 11304,
+    "vertices": 9876,
+    "textures": ["house.png", "mountain.png"]
+  }
+}
+
+Clients compare hashes against their cached manifest to fetch only the
+assets that changed.
+
+Several converters may update one manifest at the same time (e.g.
+obj_to_json.py and scene_to_json.py run in parallel into one directory):
+updates are serialized through an exclusive lock on assets-manifest.json.lock.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+MANIFEST_FILENAME = 'assets-manifest.json'
+HASH_LENGTH = 12  # hex digits kept in hashed filenames
+MANIFEST_MODE = 0o644  # mode of a new manifest; mkstemp would leave it owner-only
+
+_manifest_thread_lock = threading.Lock()
+
+
+def content_hash(data):
+    """Return the full sha256 hex digest of the given bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def hashed_filename(filename, digest):
+    """Insert the short content hash before the extension: scene.json -> scene.<hash>.json"""
+    base, extension = os.path.splitext(filename)
+    return f"{base}.{digest[:HASH_LENGTH]}{extension}"
+
+
+def default_manifest_path(filename):
+    """Manifest location for an asset: assets-manifest.json in the same directory."""
+    return os.path.join(os.path.dirname(filename), MANIFEST_FILENAME)
+
+
+def write_asset(filename, data, hashed=False):
+    """
+    Write bytes to filename, or to its content-hashed name.
+
+    Returns:
+        Manifest entry dict with the written file's basename, hash and size
+    """
+    digest = content_hash(data)
+    output_filename = hashed_filename(filename, digest) if hashed else filename
+
+    with open(output_filename, 'wb') as f:
+        f.write(data)
+
+    return {
+        "file": os.path.basename(output_filename),
+        "hash": digest,
+        "bytes": len(data)
+    }
+
+
+def mesh_stats(output):
+    """Triangle/vertex counts and referenced textures of converter output."""
+    textures = {obj['material'].get('texture') for obj in output}
+    textures.discard(None)
+    return {
+        "triangles": sum(len(obj['triangles']) for obj in output),
+        "vertices": sum(len(obj['vertices']) for obj in output),
+        "textures": sorted(textures)
+    }
+
+
+@contextmanager
+def _manifest_lock(manifest_filename):
+    """Hold an exclusive lock on <manifest>.lock across threads and processes."""
+    with _manifest_thread_lock, open(manifest_filename + '.lock', 'a+') as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def update_manifest(manifest_filename, logical_name, entry):
+    """
+    Record an asset entry under its logical name, keeping other entries.
+
+    The read-modify-write runs under the manifest lock, so concurrent writers
+    do not drop each other's entries. The new manifest is written to a unique
+    temporary file and moved into place, so readers never see a partially
+    written file.
+    """
+    with _manifest_lock(manifest_filename):
+        manifest = {}
+        mode = MANIFEST_MODE
+        if os.path.exists(manifest_filename):
+            with open(manifest_filename, 'r') as f:
+                manifest = json.load(f)
+            mode = os.stat(manifest_filename).st_mode & 0o777
+
+        manifest[logical_name] = entry
+
+        fd, temp_filename = tempfile.mkstemp(dir=os.path.dirname(manifest_filename) or '.',
+                                             prefix=os.path.basename(manifest_filename) + '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(manifest, f, indent=2, sort_keys=True)
+            os.chmod(temp_filename, mode)
+            os.replace(temp_filename, manifest_filename)
+        except BaseException:
+            os.unlink(temp_filename)
+            raise
+
+    print(f"Updated {manifest_filename}: {logical_name} -> {entry['file']}")
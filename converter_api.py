@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+In-memory library API for the OBJ converters.
+
+Lets a build server run the converters without temp files, subprocesses or
+stdout noise. Inputs (mesh and MTL) may be file paths, bytes or file-like
+objects; results are returned as dictionaries and nothing is written to disk:
+
+{
+  "sets": [...],        # triangle sets, same structure as the JSON output
+  "materials": [...],   # only with material_table=True; sets then hold indices
+  "stats": {...},       # sets/vertices/triangles, cleanup and welding counts
+  "heightfield": {...}, # scenes only, when requested: heights + grid info
+  "pvs": {...}          # scenes only, when requested: bitset + grid info
+}
+
+The only shared state is the lock-guarded MTL cache in materials.py, so the
+functions are safe to call from several threads. `convert_many` runs a batch
+on an executor; pass a ProcessPoolExecutor to spread CPU-bound conversions
+over cores (the inputs must then be paths or bytes so they can be pickled).
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import obj_to_json
+import scene_to_json
+from materials import index_materials
+from scene_pvs import compute_pvs
+
+
+def _quiet(*args, **kwargs):
+    pass
+
+
+def _result(output, stats, material_table):
+    if material_table:
+        document = index_materials(output)
+        return {"sets": document["sets"], "materials": document["materials"], "stats": stats}
+    return {"sets": output, "stats": stats}
+
+
+def convert_model(source, mtl=None, file_format=None, default_material=None, clean=True,
+                  weld_tolerance=None, material_table=False, log=None):
+    """
+    Convert a model (OBJ, binary STL or binary PLY) to WebGL-space triangle sets.
+
+    Same pipeline as obj_to_json.py: Blender Z-up to WebGL Y-up, one set per
+    material.
+
+    Args:
+        source: Mesh path, bytes or file-like object
+        mtl: Optional MTL path, bytes or file-like object
+        file_format: 'obj', 'stl' or 'ply'; detected when omitted
+        default_material: Material for faces without one
+        clean: Remove degenerate/duplicate triangles and unreferenced vertices
+        weld_tolerance: Optional (position, normal, uv) welding epsilons
+        material_table: Return deduplicated materials referenced by index
+        log: Optional callable for progress messages (silent by default)
+    """
+    log = log or _quiet
+    obj_data = obj_to_json.read_mesh_file(source, file_format, mtl, log)
+    output, stats = obj_to_json.build_triangle_sets(obj_data, default_material, clean, weld_tolerance, log)
+    return _result(output, stats, material_table)
+
+
+def convert_scene(source, mtl=None, default_material=None, clean=True, weld_tolerance=None,
+                  heightfield_resolution=None, pvs_cells=None, pvs_samples=3, material_table=False,
+                  log=None):
+    """
+    Convert a scene OBJ to per-object triangle sets with coordinates as is.
+
+    Same pipeline as scene_to_json.py. The heightfield and PVS are returned
+    in memory (array('f') heights, bytes bitset) instead of written to disk;
+    their entries are None when the scene has no ground.
+    """
+    if heightfield_resolution is not None:
+        scene_to_json.check_heightfield_resolution(heightfield_resolution)
+    log = log or _quiet
+    obj_data = scene_to_json.read_obj_file(source, mtl, log)
+    output, stats = scene_to_json.build_triangle_sets(obj_data, default_material, clean, weld_tolerance, log)
+    result = _result(output, stats, material_table)
+
+    if heightfield_resolution is not None:
+        heightfield = scene_to_json.rasterize_heightfield(output, heightfield_resolution)
+        result["heightfield"] = {"heights": heightfield[0], "info": heightfield[1]} if heightfield else None
+
+    if pvs_cells:
+        bounds = scene_to_json.battlefield_bounds(output)
+        if bounds is None:
+            result["pvs"] = None
+        else:
+            bits, info = compute_pvs(output, bounds, pvs_cells, pvs_samples)
+            result["pvs"] = {"bits": bytes(bits), "info": info}
+
+    return result
+
+
+CONVERTERS = {
+    "model": convert_model,
+    "scene": convert_scene
+}
+
+
+def _run_job(job):
+    options = dict(job)
+    kind = options.pop("kind", "model")
+    return CONVERTERS[kind](**options)
+
+
+def convert_many(jobs, executor=None, max_workers=None):
+    """
+    Convert a batch of assets concurrently.
+
+    Args:
+        jobs: Iterable of dicts holding `kind` ('model' or 'scene', default
+            'model') plus keyword arguments for convert_model/convert_scene
+        executor: Optional concurrent.futures executor to run jobs on
+        max_workers: Worker count for the default thread pool
+
+    Returns:
+        Results in job order; an exception from any job is re-raised
+    """
+    jobs = list(jobs)
+    if executor is not None:
+        return list(executor.map(_run_job, jobs))
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(_run_job, jobs))
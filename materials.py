@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Shared MTL parsing and material table deduplication for the converters.
+
+MTL libraries read from disk are cached by path, so a build that converts
+many OBJ files referencing the same library parses it once. Each entry keeps
+the file's modification time and size and is replaced when they change, so a
+long-running build server holds one entry per library. The cache is guarded
+by a lock and hands out copies, so it is safe to use from the threaded
+library API.
+
+With a material table the converter output becomes
+
+{
+  "materials": [{ "ambient": [...], "diffuse": [...], ... }, ...],
+  "sets": [{ "material": 0, "vertices": [...], ... }, ...]
+}
+
+where identical materials are stored once and sets refer to them by index.
+Models.js expands this back to the per-set form when loading.
+"""
+
+import os
+import threading
+
+from mesh_readers import is_path, open_text_source, source_name
+
+
+MATERIAL_FIELDS = ('ambient', 'diffuse', 'specular', 'n', 'alpha', 'texture')
+
+_mtl_cache = {}  # absolute path -> (mtime_ns, size, materials without default texture)
+_mtl_cache_lock = threading.Lock()
+
+
+def _copy_materials(materials, default_texture):
+    copies = {}
+    for name, material in materials.items():
+        copy = {field: list(value) if isinstance(value, list) else value for field, value in material.items()}
+        if copy['texture'] is None:
+            copy['texture'] = default_texture
+        copies[name] = copy
+    return copies
+
+
+def _parse_mtl(f, default_texture):
+    materials = {}
+    current_material = None
+
+    for line in f:
+        line = line.strip()
+
+        if not line or line.startswith('#'):
+            continue
+
+        parts = line.split()
+        if not parts:
+            continue
+
+        command = parts[0]
+
+        if command == 'newmtl':
+            # New material definition
+            current_material = parts[1]
+            materials[current_material] = {
+                'ambient': [0.2, 0.2, 0.2],
+                'diffuse': [0.8, 0.8, 0.8],
+                'specular': [0.0, 0.0, 0.0],
+                'n': 1,
+                'alpha': 1.0,
+                'texture': default_texture
+            }
+
+        elif current_material:
+            if command == 'Ka':  # Ambient color
+                materials[current_material]['ambient'] = [float(parts[1]), float(parts[2]), float(parts[3])]
+
+            elif command == 'Kd':  # Diffuse color
+                materials[current_material]['diffuse'] = [float(parts[1]), float(parts[2]), float(parts[3])]
+
+            elif command == 'Ks':  # Specular color
+                materials[current_material]['specular'] = [float(parts[1]), float(parts[2]), float(parts[3])]
+
+            elif command == 'Ns':  # Specular exponent
+                materials[current_material]['n'] = float(parts[1])
+
+            elif command in ['map_Kd', 'map_Ka', 'map_d']:  # Texture map
+                materials[current_material]['texture'] = ' '.join(parts[1:])
+
+            elif command == 'd':  # Transparency (alpha)
+                materials[current_material]['alpha'] = float(parts[1])
+
+            elif command == 'Tr':  # Alternate transparency definition (1 - alpha)
+                materials[current_material]['alpha'] = 1.0 - float(parts[1])
+
+    return materials
+
+
+def parse_mtl_file(mtl_source, default_texture=None, log=print):
+    """
+    Parse MTL (material) file and extract material properties
+
+    Args:
+        mtl_source: MTL file path, bytes or file-like object
+        default_texture: Texture given to materials without a map_* entry
+        log: Callable used for progress messages
+
+    Returns:
+        Dictionary mapping material names to material properties
+    """
+    # Catch a logger passed positionally as the texture; it would end up in every material
+    if default_texture is not None and not isinstance(default_texture, str):
+        raise TypeError(f"default_texture must be a texture filename or None, not {type(default_texture).__name__}")
+
+    if not is_path(mtl_source):
+        log(f"Reading material file: {source_name(mtl_source)}")
+        with open_text_source(mtl_source) as f:
+            return _parse_mtl(f, default_texture)
+
+    if not os.path.exists(mtl_source):
+        log(f"Warning: Material file {mtl_source} not found")
+        return {}
+
+    stat = os.stat(mtl_source)
+    key = os.path.abspath(mtl_source)
+    with _mtl_cache_lock:
+        cached = _mtl_cache.get(key)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        log(f"Using cached material file: {mtl_source}")
+        return _copy_materials(cached[2], default_texture)
+
+    log(f"Reading material file: {mtl_source}")
+    with open_text_source(mtl_source) as f:
+        materials = _parse_mtl(f, None)
+
+    with _mtl_cache_lock:
+        _mtl_cache[key] = (stat.st_mtime_ns, stat.st_size, materials)
+    return _copy_materials(materials, default_texture)
+
+
+def output_material(material):
+    """The material fields written to JSON, with the converters' defaults."""
+    return {
+        "ambient": material['ambient'],
+        "diffuse": material['diffuse'],
+        "specular": material['specular'],
+        "n": material['n'],
+        "alpha": material.get('alpha', 1.0),
+        "texture": material.get('texture')
+    }
+
+
+class MaterialRegistry:
+    """Deduplicate materials into a table and hand out their indices."""
+
+    def __init__(self):
+        self.table = []
+        self._index = {}
+
+    def add(self, material):
+        """Return the table index for material, adding it if not seen before."""
+        key = tuple(
+            tuple(value) if isinstance(value, list) else value
+            for value in (material.get(field) for field in MATERIAL_FIELDS)
+        )
+        index = self._index.get(key)
+        if index is None:
+            index = len(self.table)
+            self._index[key] = index
+            self.table.append(material)
+        return index
+
+
+def index_materials(output):
+    """
+    Convert per-set materials into a shared table.
+
+    Returns:
+        {"materials": [...], "sets": [...]} with each set's material replaced
+        by its table index
+    """
+    registry = MaterialRegistry()
+    sets = []
+    for obj in output:
+        indexed = dict(obj)
+        indexed['material'] = registry.add(obj['material'])
+        sets.append(indexed)
+    return {"materials": registry.table, "sets": sets}
+
+
+def expand_materials(document):
+    """Inverse of index_materials; plain lists of sets are returned unchanged."""
+    if isinstance(document, list):
+        return document
+    table = document['materials']
+    return [dict(obj, material=table[obj['material']]) for obj in document['sets']]
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Mesh cleanup shared by the OBJ converters.
+
+Removes geometry that costs GPU work and download bytes without drawing
+anything visible:
+  - degenerate triangles (repeated indices, or corners collinear to within
+    floating point noise)
+  - duplicate triangles (same three positions with the same winding)
+  - vertices no remaining triangle references
+
+Run as a script to check that cleanup of a scene only removes collapsed or
+exactly zero-area triangles (exit status 1 otherwise):
+
+    python mesh_cleanup.py scene_2.obj
+"""
+
+import math
+import sys
+from fractions import Fraction
+
+
+# Degenerate when area / (longest edge)^2 is below this; independent of scale
+SHAPE_EPSILON = 1e-10
+
+
+def _triangle_area_sq(p0, p1, p2):
+    """Return the squared length of the triangle's cross product (4 * area^2)."""
+    ux, uy, uz = p1[0] - p0[0], p1[1] - p0[1], p1[2] - p0[2]
+    vx, vy, vz = p2[0] - p0[0], p2[1] - p0[1], p2[2] - p0[2]
+    nx = uy * vz - uz * vy
+    ny = uz * vx - ux * vz
+    nz = ux * vy - uy * vx
+    return nx * nx + ny * ny + nz * nz
+
+
+def _longest_edge_sq(p0, p1, p2):
+    return max(
+        (p1[0] - p0[0]) ** 2 + (p1[1] - p0[1]) ** 2 + (p1[2] - p0[2]) ** 2,
+        (p2[0] - p1[0]) ** 2 + (p2[1] - p1[1]) ** 2 + (p2[2] - p1[2]) ** 2,
+        (p0[0] - p2[0]) ** 2 + (p0[1] - p2[1]) ** 2 + (p0[2] - p2[2]) ** 2
+    )
+
+
+def is_degenerate(p0, p1, p2, shape_epsilon=SHAPE_EPSILON):
+    """
+    True when the triangle has (almost) no area relative to its size.
+
+    Compares area with the squared longest edge instead of a fixed area, so
+    small but well-shaped triangles are kept at any model scale.
+    """
+    # 4 * area^2 < 4 * (eps * longest^2)^2
+    limit = shape_epsilon * _longest_edge_sq(p0, p1, p2)
+    return _triangle_area_sq(p0, p1, p2) <= 4.0 * limit * limit
+
+
+def _winding_key(a, b, c):
+    """Rotate the triangle so its smallest corner comes first, keeping winding."""
+    if a <= b and a <= c:
+        return (a, b, c)
+    if b <= a and b <= c:
+        return (b, c, a)
+    return (c, a, b)
+
+
+def clean_triangle_set(vertices, normals, uvs, triangles, shape_epsilon=SHAPE_EPSILON):
+    """
+    Remove degenerate, duplicate and unreferenced geometry from one triangle set.
+
+    Duplicates are matched on vertex positions rather than indices, so a face
+    exported twice with different normals or UVs is still caught. Opposite
+    windings are kept since they are intentionally double-sided faces.
+
+    Args:
+        vertices: list of [x, y, z] positions
+        normals: list of [x, y, z] normals, parallel to vertices
+        uvs: list of [u, v] coordinates, parallel to vertices
+        triangles: list of [i0, i1, i2] indices into vertices
+        shape_epsilon: triangles with area / (longest edge)^2 below this are degenerate
+
+    Returns:
+        (vertices, normals, uvs, triangles, stats) where stats counts the
+        'degenerate', 'duplicate' and 'unreferenced' items removed
+    """
+    position_keys = [tuple(position) for position in vertices]
+
+    kept = []
+    seen = set()
+    degenerate = 0
+    duplicate = 0
+    for tri in triangles:
+        i0, i1, i2 = tri
+        if i0 == i1 or i1 == i2 or i0 == i2 or \
+                is_degenerate(vertices[i0], vertices[i1], vertices[i2], shape_epsilon):
+            degenerate += 1
+            continue
+        key = _winding_key(position_keys[i0], position_keys[i1], position_keys[i2])
+        if key in seen:
+            duplicate += 1
+            continue
+        seen.add(key)
+        kept.append(tri)
+
+    # Compact the attribute pools to the vertices still in use, keeping their order
+    referenced = bytearray(len(vertices))
+    for tri in kept:
+        referenced[tri[0]] = referenced[tri[1]] = referenced[tri[2]] = 1
+
+    remap = [-1] * len(vertices)
+    new_vertices = []
+    new_normals = []
+    new_uvs = []
+    for old_idx, used in enumerate(referenced):
+        if used:
+            remap[old_idx] = len(new_vertices)
+            new_vertices.append(vertices[old_idx])
+            new_normals.append(normals[old_idx])
+            new_uvs.append(uvs[old_idx])
+
+    new_triangles = [[remap[tri[0]], remap[tri[1]], remap[tri[2]]] for tri in kept]
+
+    stats = {
+        'degenerate': degenerate,
+        'duplicate': duplicate,
+        'unreferenced': len(vertices) - len(new_vertices)
+    }
+    return new_vertices, new_normals, new_uvs, new_triangles, stats
+
+
+def print_cleanup_stats(stats, indent="  ", log=print):
+    log(f"{indent}Cleanup: removed {stats['degenerate']} degenerate, "
+        f"{stats['duplicate']} duplicate triangles, {stats['unreferenced']} unreferenced vertices")
+
+
+def _exactly_collinear(p0, p1, p2):
+    """
+    Exact zero-area test on the decimal coordinates, independent of is_degenerate.
+
+    Positions are taken as the shortest decimals that round-trip (what the OBJ
+    file holds) and the cross product is evaluated in rational arithmetic.
+    """
+    a, b, c = ([Fraction(repr(component)) for component in point] for point in (p0, p1, p2))
+    ux, uy, uz = b[0] - a[0], b[1] - a[1], b[2] - a[2]
+    vx, vy, vz = c[0] - a[0], c[1] - a[1], c[2] - a[2]
+    return uy * vz == uz * vy and uz * vx == ux * vz and ux * vy == uy * vx
+
+
+def check_cleanup(output):
+    """
+    Verify that every triangle cleanup would drop as degenerate really has no area.
+
+    Args:
+        output: Uncleaned triangle sets (converted with clean=False)
+
+    Returns:
+        (counts, offenders) where counts splits the degenerate triangles into
+        'collapsed' (repeated indices) and 'zeroArea' (exactly collinear), and
+        offenders lists (set index, triangle, area / longest edge^2) for the
+        ones is_degenerate flags although they have area
+    """
+    counts = {'collapsed': 0, 'zeroArea': 0}
+    offenders = []
+    for set_idx, obj in enumerate(output):
+        positions = obj['vertices']
+        for tri in obj['triangles']:
+            i0, i1, i2 = tri
+            if i0 == i1 or i1 == i2 or i0 == i2:
+                counts['collapsed'] += 1
+                continue
+            p0, p1, p2 = positions[i0], positions[i1], positions[i2]
+            if not is_degenerate(p0, p1, p2):
+                continue
+            if _exactly_collinear(p0, p1, p2):
+                counts['zeroArea'] += 1
+            else:
+                longest_sq = _longest_edge_sq(p0, p1, p2)
+                offenders.append((set_idx, tri, math.sqrt(_triangle_area_sq(p0, p1, p2)) / 2.0 / longest_sq))
+    return counts, offenders
+
+
+if __name__ == "__main__":
+    from mesh_converter import SCENE_PROFILE, build_triangle_sets, read_mesh
+
+    obj_filename = sys.argv[1] if len(sys.argv) > 1 else "scene.obj"
+    quiet = lambda *args, **kwargs: None
+    mesh = read_mesh(obj_filename, SCENE_PROFILE, log=quiet)
+    output, _ = build_triangle_sets(mesh, SCENE_PROFILE, clean=False, log=quiet)
+    counts, offenders = check_cleanup(output)
+
+    print(f"{obj_filename}: {counts['collapsed']} collapsed, {counts['zeroArea']} zero-area degenerate triangles")
+    for set_idx, tri, ratio in offenders:
+        print(f"  set {set_idx} ({output[set_idx].get('type')}) triangle {tri}: area / longest^2 = {ratio:.3g}")
+    if offenders:
+        print(f"{len(offenders)} triangles with nonzero area would be removed")
+    sys.exit(1 if offenders else 0)
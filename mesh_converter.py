@@ -0,0 +1,570 @@
+#!/usr/bin/env python3
+"""
+Single-pass conversion engine shared by obj_to_json.py and scene_to_json.py.
+
+The two converters only differ in how they map the source data: the axis
+transform applied to positions and normals, whether UVs are flipped, and
+whether faces are grouped into sets by material or by object. Those choices
+live in a ConversionProfile; everything else (parsing, triangulation,
+welding, cleanup, output) is this one pipeline.
+
+The profile is applied while the OBJ is parsed: each `v` / `vn` / `vt` line is
+transformed, normalized or flipped as it is read, and each face is fan
+triangulated straight into its group. There are no intermediate face dicts
+and no second pass over the vertex arrays. STL and PLY data from
+mesh_readers.py goes through `prepare_mesh`, which does the same in one loop
+per array.
+"""
+
+import argparse
+import json
+import math
+import os
+
+from asset_manifest import default_manifest_path, mesh_stats, update_manifest, write_asset
+from materials import index_materials, output_material, parse_mtl_file
+from mesh_cleanup import clean_triangle_set, print_cleanup_stats
+from mesh_readers import (is_path, open_text_source, read_ply_file, read_source_bytes, read_stl_file,
+                          sniff_mesh_format, source_name)
+from vertex_weld import DEFAULT_WELD_EPSILON, VertexWelder
+
+
+def blender_to_webgl(vertex):
+    """
+    Convert vertex/normal from Blender (Z-up) to WebGL (Y-up) coordinates
+    Transformation: X_webgl = X_blender, Y_webgl = Z_blender, Z_webgl = -Y_blender
+    """
+    return [vertex[0], vertex[2], -vertex[1]]
+
+
+def normalize(vector):
+    length = math.sqrt(vector[0] ** 2 + vector[1] ** 2 + vector[2] ** 2)
+    if length == 0:
+        return [0.0, 0.0, 0.0]
+    return [component / length for component in vector]
+
+
+def compute_face_normal(p0, p1, p2):
+    """Compute normalized face normal for triangle defined by p0, p1, p2."""
+    ux, uy, uz = p1[0] - p0[0], p1[1] - p0[1], p1[2] - p0[2]
+    vx, vy, vz = p2[0] - p0[0], p2[1] - p0[1], p2[2] - p0[2]
+    nx = uy * vz - uz * vy
+    ny = uz * vx - ux * vz
+    nz = ux * vy - uy * vx
+    return normalize([nx, ny, nz])
+
+
+def get_object_texture(object_name):
+    """
+    Get the texture file for a specific object name.
+    """
+    model_type = object_name.split('.')[0]
+    return model_type + '.png'
+
+
+class ConversionProfile:
+    """
+    How source data is mapped into output triangle sets.
+
+    Args:
+        name: Short name used in messages
+        axis_transform: Callable applied to every position and normal, or
+            None to keep coordinates as is
+        flip_uvs: Store UVs as (1 - u, 1 - v)
+        group_by: 'material' for one set per material, or 'object' for one
+            set per OBJ object using the object's first material, a texture
+            named after the object and a "type" entry (see Models.js)
+        default_texture: Texture of the default material
+        mtl_default_texture: Texture given to MTL materials without a map_* entry
+        diagnostics: Log bounds, camera suggestions and average normals
+        transform_message: Logged before parsing to describe the transform
+    """
+
+    def __init__(self, name, axis_transform=None, flip_uvs=False, group_by='material', default_texture=None,
+                 mtl_default_texture=None, diagnostics=False, transform_message=None):
+        if group_by not in ('material', 'object'):
+            raise ValueError(f"Unknown grouping {group_by!r}")
+        self.name = name
+        self.axis_transform = axis_transform
+        self.flip_uvs = flip_uvs
+        self.group_by = group_by
+        self.default_texture = default_texture
+        self.mtl_default_texture = mtl_default_texture
+        self.diagnostics = diagnostics
+        self.transform_message = transform_message
+
+    def default_material(self):
+        return {
+            "ambient": [0.2, 0.2, 0.2],
+            "diffuse": [0.8, 0.8, 0.8],
+            "specular": [0.3, 0.3, 0.3],
+            "n": 11,
+            "alpha": 1.0,
+            "texture": self.default_texture
+        }
+
+
+# Models exported from Blender: Z-up to Y-up, flipped UVs, one set per material
+MODEL_PROFILE = ConversionProfile(
+    "model",
+    axis_transform=blender_to_webgl,
+    flip_uvs=True,
+    group_by='material',
+    default_texture="cat.png",
+    mtl_default_texture="enemy_tank.png",
+    diagnostics=True,
+    transform_message="Converting from Blender (Z-up) to WebGL (Y-up) coordinate system..."
+)
+
+# Scenes exported with the desired axes already: coordinates and UVs as is, one set per object
+SCENE_PROFILE = ConversionProfile(
+    "scene",
+    group_by='object',
+    transform_message="Using OBJ coordinates 'as is' (assuming correct export settings)..."
+)
+
+
+def _group_key(profile, material_name, object_name):
+    if profile.group_by == 'object':
+        return object_name or 'unknown'
+    return material_name or 'default'
+
+
+def read_obj(source, profile, mtl_source=None, log=print):
+    """
+    Parse an OBJ file with the profile's transforms and grouping applied.
+
+    Args:
+        source: OBJ file path, bytes or file-like object
+        profile: ConversionProfile to apply
+        mtl_source: Optional MTL path, bytes or file-like object; overrides the
+            `mtllib` lookup, which only works for OBJ files read from a path
+        log: Callable used for progress messages
+
+    Returns:
+        Dictionary containing:
+        - vertices: list of transformed [x, y, z] positions
+        - normals: list of transformed, normalized [x, y, z] normals
+        - uvs: list of [u, v] texture coordinates in the profile's convention
+        - groups: group key -> {'material': first material name,
+          'triangles': list of ((v, vt, vn), (v, vt, vn), (v, vt, vn))}
+          with 0-based indices, None where an index is missing
+        - materials: material name -> material properties
+    """
+    axis_transform = profile.axis_transform
+    flip_uvs = profile.flip_uvs
+    group_by_object = profile.group_by == 'object'
+
+    vertices = []
+    normals = []
+    uvs = []
+    groups = {}
+    face_count = 0
+
+    current_material = None
+    current_object = None
+    current_group = None  # group of the current material/object, looked up lazily
+    materials = parse_mtl_file(mtl_source, profile.mtl_default_texture, log) if mtl_source is not None else {}
+
+    log(profile.transform_message)
+    log(f"Reading OBJ file: {source_name(source)}")
+
+    with open_text_source(source) as f:
+        for line in f:
+            line = line.strip()
+
+            if not line or line.startswith('#'):
+                continue
+
+            parts = line.split()
+            if not parts:
+                continue
+
+            command = parts[0]
+
+            # Vertex position
+            if command == 'v':
+                position = [float(parts[1]), float(parts[2]), float(parts[3])]
+                vertices.append(axis_transform(position) if axis_transform else position)
+
+            # Texture coordinate
+            elif command == 'vt':
+                u, v = float(parts[1]), float(parts[2])
+                # Flipped UVs let the shader's (1 - x, 1 - y) restore the Blender UVs
+                uvs.append([1.0 - u, 1.0 - v] if flip_uvs else [u, v])
+
+            # Vertex normal
+            elif command == 'vn':
+                normal = [float(parts[1]), float(parts[2]), float(parts[3])]
+                normals.append(normalize(axis_transform(normal) if axis_transform else normal))
+
+            # Face definition (v, v/vt, v/vt/vn or v//vn corners), fan triangulated
+            elif command == 'f':
+                corners = []
+                for vertex_str in parts[1:]:
+                    indices = vertex_str.split('/')
+                    corners.append((
+                        int(indices[0]) - 1,
+                        int(indices[1]) - 1 if len(indices) > 1 and indices[1] else None,
+                        int(indices[2]) - 1 if len(indices) > 2 and indices[2] else None
+                    ))
+
+                if current_group is None:
+                    key = _group_key(profile, current_material, current_object)
+                    current_group = groups.get(key)
+                    if current_group is None:
+                        current_group = groups[key] = {'material': current_material or 'default', 'triangles': []}
+
+                triangles = current_group['triangles']
+                first = corners[0]
+                for i in range(1, len(corners) - 1):
+                    triangles.append((first, corners[i], corners[i + 1]))
+                face_count += 1
+
+            elif command == 'usemtl':
+                current_material = parts[1]
+                if not group_by_object:
+                    current_group = None
+
+            elif command == 'o':
+                current_object = parts[1] if len(parts) > 1 else None
+                if group_by_object:
+                    current_group = None
+
+            # Reference to material library, looked up next to the OBJ
+            elif command == 'mtllib':
+                if mtl_source is None and is_path(source):
+                    mtl_filename = ' '.join(parts[1:])
+                    mtl_path = os.path.join(os.path.dirname(source), mtl_filename)
+                    materials = parse_mtl_file(mtl_path, profile.mtl_default_texture, log)
+
+    log(f"Loaded: {len(vertices)} vertices, {len(normals)} normals, {len(uvs)} UVs, {face_count} faces")
+
+    return {
+        'vertices': vertices,
+        'normals': normals,
+        'uvs': uvs,
+        'groups': groups,
+        'materials': materials
+    }
+
+
+def prepare_mesh(mesh_data, profile, log=print):
+    """
+    Apply a profile to mesh data from mesh_readers.py.
+
+    The readers already emit grouped corner tuples; this builds the position,
+    normal and UV lists in one pass each with the profile's transforms applied
+    and names the group. Returns the same structure as `read_obj`.
+    """
+    axis_transform = profile.axis_transform
+    log(profile.transform_message)
+
+    if axis_transform:
+        vertices = [axis_transform(position) for position in mesh_data['vertices']]
+        normals = [normalize(axis_transform(normal)) for normal in mesh_data['normals']]
+    else:
+        vertices = list(map(list, mesh_data['vertices']))
+        normals = list(map(normalize, mesh_data['normals']))
+    if profile.flip_uvs:
+        uvs = [[1.0 - u, 1.0 - v] for u, v in mesh_data['uvs']]
+    else:
+        uvs = list(map(list, mesh_data['uvs']))
+
+    groups = {}
+    for group in mesh_data['groups'].values():
+        key = _group_key(profile, group['material'], None)
+        groups[key] = {'material': group['material'] or 'default', 'triangles': group['triangles']}
+
+    return {
+        'vertices': vertices,
+        'normals': normals,
+        'uvs': uvs,
+        'groups': groups,
+        'materials': mesh_data['materials']
+    }
+
+
+def read_mesh(source, profile, file_format=None, mtl_source=None, log=print):
+    """
+    Read an OBJ, binary STL or binary PLY file with a profile applied.
+
+    The format is taken from file_format ('obj', 'stl' or 'ply'), else from
+    the extension of a path, else sniffed from in-memory contents. All formats
+    return the structure documented in `read_obj`.
+    """
+    if file_format is None:
+        if is_path(source):
+            file_format = os.path.splitext(source)[1].lower().lstrip('.')
+        else:
+            filename = source_name(source)
+            source = read_source_bytes(source)
+            file_format = sniff_mesh_format(source, filename)
+
+    if file_format == 'stl':
+        return prepare_mesh(read_stl_file(source, log), profile, log)
+    if file_format == 'ply':
+        return prepare_mesh(read_ply_file(source, log), profile, log)
+    return read_obj(source, profile, mtl_source, log)
+
+
+def _log_bounds(log, label, center_label, bounds_min, bounds_max, indent):
+    center = [(bounds_min[i] + bounds_max[i]) / 2.0 for i in range(3)]
+    size = [bounds_max[i] - bounds_min[i] for i in range(3)]
+    diagonal = math.sqrt(sum(component ** 2 for component in size))
+    fov_radians = math.pi / 2.0  # 90 degrees, matches make_it_your_own.js
+    radius = diagonal * 0.5
+    camera_distance = radius / math.tan(fov_radians / 2.0) if radius > 0 else 1.0
+    suggested_eye = [
+        round(center[0], 4),
+        round(center[1], 4),
+        round(center[2] - camera_distance, 4)
+    ]
+    log(f"{indent}{label}:")
+    log(f"{indent}  X: {bounds_min[0]:.4f} -> {bounds_max[0]:.4f} (width {size[0]:.4f})")
+    log(f"{indent}  Y: {bounds_min[1]:.4f} -> {bounds_max[1]:.4f} (height {size[1]:.4f})")
+    log(f"{indent}  Z: {bounds_min[2]:.4f} -> {bounds_max[2]:.4f} (depth {size[2]:.4f})")
+    log(f"{indent}  {center_label}: {[round(c, 4) for c in center]}")
+    log(f"{indent}  Suggested translation to center at origin: {[round(-c, 4) for c in center]}")
+    log(f"{indent}  Suggested camera eye (look towards +Z): {suggested_eye}")
+
+
+def _average_normal(normal_sum, count):
+    return normalize([normal_sum[0] / count, normal_sum[1] / count, normal_sum[2] / count])
+
+
+def build_triangle_sets(mesh, profile, default_material=None, clean=True, weld_tolerance=None, log=print):
+    """
+    Build triangle sets from a mesh returned by `read_mesh` / `read_obj`.
+
+    Does no file I/O; all messages go through log, so it is safe to call
+    from several threads at once.
+
+    Args:
+        mesh: Parsed mesh with the same profile applied
+        profile: ConversionProfile the mesh was read with
+        default_material: Optional default material properties dict
+        clean: Remove degenerate/duplicate triangles and unreferenced vertices
+        weld_tolerance: Optional (position, normal, uv) epsilons for tolerance
+            welding; None keeps exact welding
+        log: Callable used for progress and diagnostic messages
+
+    Returns:
+        (output, stats) where output is the list of triangle sets written to
+        JSON and stats holds vertex/triangle/set totals, cleanup counts and
+        the vertices saved by tolerance welding
+    """
+    if default_material is None:
+        default_material = profile.default_material()
+
+    positions = mesh['vertices']
+    mesh_normals = mesh['normals']
+    mesh_uvs = mesh['uvs']
+    materials = mesh['materials']
+    normal_count = len(mesh_normals)
+    uv_count = len(mesh_uvs)
+    group_by_object = profile.group_by == 'object'
+    diagnostics = profile.diagnostics
+
+    scene_min = [float("inf")] * 3
+    scene_max = [float("-inf")] * 3
+    scene_normal_sum = [0.0, 0.0, 0.0]
+    scene_normal_count = 0
+    cleanup_totals = {'degenerate': 0, 'duplicate': 0, 'unreferenced': 0}
+    weld_saved = 0
+
+    if group_by_object:
+        log(f"Found {len(mesh['groups'])} objects")
+    else:
+        log(f"Found {len(mesh['groups'])} material groups")
+
+    output = []
+
+    for group_name, group in mesh['groups'].items():
+        log(f"\nProcessing {profile.group_by}: {group_name}")
+
+        material_name = group['material']
+        if material_name in materials:
+            material = materials[material_name].copy()
+        else:
+            material = default_material.copy()
+        if group_by_object:
+            material['texture'] = get_object_texture(group_name)
+
+        welder = VertexWelder(weld_tolerance)
+        add_vertex = welder.add
+        triangles = []
+        set_min = [float("inf")] * 3
+        set_max = [float("-inf")] * 3
+        set_normal_sum = [0.0, 0.0, 0.0]
+        set_normal_count = 0
+
+        for tri in group['triangles']:
+            face_normal = None
+            triangle_indices = []
+
+            for v_idx, vt_idx, vn_idx in tri:
+                position = positions[v_idx]
+
+                if vn_idx is not None and vn_idx < normal_count:
+                    normal = mesh_normals[vn_idx]
+                else:
+                    if face_normal is None:
+                        face_normal = compute_face_normal(
+                            positions[tri[0][0]], positions[tri[1][0]], positions[tri[2][0]])
+                    normal = face_normal
+
+                if vt_idx is not None and vt_idx < uv_count:
+                    uv = mesh_uvs[vt_idx]
+                else:
+                    uv = [0.0, 0.0]
+
+                # Weld on position, normal and uv
+                vertex_idx, is_new = add_vertex(position, normal, uv)
+                triangle_indices.append(vertex_idx)
+
+                if is_new and diagnostics:
+                    for axis in range(3):
+                        set_min[axis] = min(set_min[axis], position[axis])
+                        set_max[axis] = max(set_max[axis], position[axis])
+                        scene_min[axis] = min(scene_min[axis], position[axis])
+                        scene_max[axis] = max(scene_max[axis], position[axis])
+                        set_normal_sum[axis] += normal[axis]
+                        scene_normal_sum[axis] += normal[axis]
+                    set_normal_count += 1
+                    scene_normal_count += 1
+
+            triangles.append(triangle_indices)
+
+        vertices, normals, uvs = welder.vertices, welder.normals, welder.uvs
+        if weld_tolerance is not None:
+            weld_saved += welder.saved
+            log(f"  Tolerance welding saved {welder.saved} vertices vs exact welding")
+
+        if clean:
+            vertices, normals, uvs, triangles, cleanup_stats = clean_triangle_set(vertices, normals, uvs, triangles)
+            for category, count in cleanup_stats.items():
+                cleanup_totals[category] += count
+            print_cleanup_stats(cleanup_stats, log=log)
+
+        obj_output = {"material": output_material(material)}
+        if group_by_object:
+            obj_output["type"] = group_name.split('.')[0]
+        obj_output["vertices"] = vertices
+        obj_output["normals"] = normals
+        obj_output["uvs"] = uvs
+        obj_output["triangles"] = triangles
+        output.append(obj_output)
+
+        if diagnostics:
+            log(f"  Vertices: {len(vertices)}")
+            log(f"  Triangles: {len(triangles)}")
+            log(f"  Texture: {material.get('texture', 'None')}")
+            if vertices:
+                _log_bounds(log, "Bounds (WebGL)", "Center (use as camera target)", set_min, set_max, "  ")
+                if set_normal_count:
+                    avg_normal = _average_normal(set_normal_sum, set_normal_count)
+                    log(f"    Average vertex normal: {[round(component, 4) for component in avg_normal]}")
+                    if avg_normal[1] < 0:
+                        log("    Note: average normal points downward; model may appear inverted around X axis.")
+
+    if diagnostics and positions:
+        log("\nScene diagnostics:")
+        _log_bounds(log, "Scene bounds (WebGL)", "Scene center (camera target)", scene_min, scene_max, "  ")
+        if scene_normal_count:
+            avg_scene_normal = _average_normal(scene_normal_sum, scene_normal_count)
+            log(f"    Average vertex normal (scene): {[round(component, 4) for component in avg_scene_normal]}")
+            if avg_scene_normal[1] < 0:
+                log("    Note: average scene normal points downward; consider rotating 180 degrees about the X axis.")
+
+    stats = {
+        "sets": len(output),
+        "vertices": sum(len(obj['vertices']) for obj in output),
+        "triangles": sum(len(obj['triangles']) for obj in output),
+        "cleanup": cleanup_totals if clean else None,
+        "weldSaved": weld_saved if weld_tolerance is not None else None
+    }
+    return output, stats
+
+
+def write_output(output, json_filename, hashed=False, manifest_filename=None, material_table=False):
+    """
+    Write converter output as JSON and record it in the asset manifest.
+
+    Returns:
+        The asset entry from `write_asset`
+    """
+    print(f"\nWriting {json_filename}...")
+    if material_table:
+        # Table form is meant for shipping, so skip the pretty-printing
+        payload = json.dumps(index_materials(output), separators=(',', ':'))
+    else:
+        payload = json.dumps(output, indent=2)
+    entry = write_asset(json_filename, payload.encode('utf-8'), hashed=hashed)
+    if hashed:
+        print(f"  Content-hashed file: {entry['file']}")
+    if manifest_filename:
+        entry.update(mesh_stats(output))
+        update_manifest(manifest_filename, os.path.basename(json_filename), entry)
+    return entry
+
+
+def resolve_manifest(json_filename, hashed, manifest_filename):
+    if hashed and manifest_filename is None:
+        return default_manifest_path(json_filename)
+    return manifest_filename
+
+
+def add_converter_arguments(parser):
+    """Add the command line options shared by both converters."""
+    parser.add_argument("--no-clean", dest="clean", action="store_false",
+                        help="keep degenerate/duplicate triangles and unreferenced vertices")
+    parser.add_argument("--hashed", action="store_true",
+                        help="write content-hashed filenames and record them in assets-manifest.json")
+    parser.add_argument("--manifest", metavar="PATH",
+                        help="asset manifest to update "
+                             "(default: assets-manifest.json next to the output when --hashed)")
+    parser.add_argument("--budget", metavar="PATH",
+                        help="check the output against a render budget file (see scene_budget.py); exit 1 if exceeded")
+    parser.add_argument("--material-table", action="store_true",
+                        help="write each distinct material once and reference it by index from the sets")
+    parser.add_argument("--weld-position", type=positive_float, metavar="EPS",
+                        help="weld vertices within EPS of each other (enables tolerance welding)")
+    parser.add_argument("--weld-normal", type=non_negative_float, metavar="EPS",
+                        help=f"normal component tolerance for tolerance welding (default {DEFAULT_WELD_EPSILON:g}; "
+                             "needs --weld-position)")
+    parser.add_argument("--weld-uv", type=non_negative_float, metavar="EPS",
+                        help=f"UV component tolerance for tolerance welding (default {DEFAULT_WELD_EPSILON:g}; "
+                             "needs --weld-position)")
+
+
+def positive_float(value):
+    """argparse type for tolerances that must be greater than zero."""
+    number = float(value)
+    if not number > 0:
+        raise argparse.ArgumentTypeError(f"must be positive (got {value})")
+    return number
+
+
+def non_negative_float(value):
+    """argparse type for tolerances that may be zero but not negative."""
+    number = float(value)
+    if not number >= 0:
+        raise argparse.ArgumentTypeError(f"must not be negative (got {value})")
+    return number
+
+
+def weld_tolerance_from_args(parser, args):
+    """
+    Turn the --weld-* options into a weld_tolerance tuple, or None for exact welding.
+
+    Exits through parser.error when a normal or UV tolerance is given without
+    --weld-position, since it would otherwise be ignored.
+    """
+    if args.weld_position is None:
+        if args.weld_normal is not None or args.weld_uv is not None:
+            parser.error("--weld-normal and --weld-uv need --weld-position")
+        return None
+    normal_epsilon = DEFAULT_WELD_EPSILON if args.weld_normal is None else args.weld_normal
+    uv_epsilon = DEFAULT_WELD_EPSILON if args.weld_uv is None else args.weld_uv
+    return (args.weld_position, normal_epsilon, uv_epsilon)
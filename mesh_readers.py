@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Binary STL and PLY readers for the OBJ converters.
+
+Both readers return the grouped corner form of mesh_converter.read_obj
+(vertices, normals, uvs, groups, materials) with (x, y, z) / (u, v) tuples
+in source coordinates and a single group keyed None;
+mesh_converter.prepare_mesh applies the conversion profile while turning
+them into lists, so the files go through the same weld/emit pipeline as OBJ.
+Vertex blocks are decoded in bulk with array.frombytes (or
+struct.iter_unpack for mixed property types) and STL positions are merged
+while reading, avoiding the per-line string handling that makes text OBJ
+slow to parse.
+
+Supported inputs:
+  - binary STL
+  - binary_little_endian PLY with float/int vertex properties and a
+    `vertex_indices` (or `vertex_index`) list on the face element
+
+Every reader accepts a file path, a bytes-like object or a file-like object,
+so the converters can run on in-memory data (see converter_api.py).
+"""
+
+import io
+import os
+import struct
+import sys
+from array import array
+from contextlib import contextmanager
+
+
+STL_HEADER_SIZE = 80
+STL_RECORD = struct.Struct('<12fH')  # normal, 3 corners, attribute byte count
+
+PLY_TYPES = {
+    'char': 'b', 'int8': 'b',
+    'uchar': 'B', 'uint8': 'B',
+    'short': 'h', 'int16': 'h',
+    'ushort': 'H', 'uint16': 'H',
+    'int': 'i', 'int32': 'i',
+    'uint': 'I', 'uint32': 'I',
+    'float': 'f', 'float32': 'f',
+    'double': 'd', 'float64': 'd'
+}
+
+PLY_U_NAMES = ('u', 's', 'texture_u', 'texture_s')
+PLY_V_NAMES = ('v', 't', 'texture_v', 'texture_t')
+
+
+def is_path(source):
+    return isinstance(source, (str, os.PathLike))
+
+
+def source_name(source):
+    """Printable name for a path, file object or in-memory buffer."""
+    if is_path(source):
+        return os.fspath(source)
+    return getattr(source, 'name', '<memory>')
+
+
+def read_source_bytes(source):
+    """Return the full contents of a path, bytes-like or file-like source as bytes."""
+    if is_path(source):
+        with open(source, 'rb') as f:
+            return f.read()
+    if isinstance(source, (bytes, bytearray)):
+        return source
+    if isinstance(source, memoryview):
+        return source.tobytes()
+    data = source.read()
+    return data.encode('utf-8') if isinstance(data, str) else data
+
+
+@contextmanager
+def open_text_source(source):
+    """Open a path, bytes-like or file-like source for line-by-line text reading."""
+    if is_path(source):
+        with open(source, 'r') as f:
+            yield f
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        yield io.StringIO(bytes(source).decode('utf-8'))
+    else:
+        data = source.read()
+        yield io.StringIO(data.decode('utf-8') if isinstance(data, (bytes, bytearray)) else data)
+
+
+def sniff_mesh_format(data, filename='<memory>'):
+    """
+    Guess 'ply', 'stl' or 'obj' from the contents of an in-memory mesh.
+
+    Raises ValueError for ASCII STL, like `read_stl_file` does for paths,
+    rather than letting it parse as an OBJ with no geometry.
+    """
+    if data[:3] == b'ply':
+        return 'ply'
+    if len(data) >= STL_HEADER_SIZE + 4:
+        (facet_count,) = struct.unpack_from('<I', data, STL_HEADER_SIZE)
+        if STL_HEADER_SIZE + 4 + facet_count * STL_RECORD.size == len(data):
+            return 'stl'
+    # Binary STL headers may also start with "solid", so this only runs after the size check
+    head = bytes(data[:4096]).lstrip().lower()
+    if head.startswith(b'solid') and (b'facet' in head or b'endsolid' in head):
+        raise ValueError(f"{filename} is not a binary STL file (ASCII STL is not supported)")
+    return 'obj'
+
+
+def _mesh(vertices, normals, uvs, triangles):
+    """Reader result in the grouped corner form of mesh_converter.read_obj."""
+    return {
+        'vertices': vertices,
+        'normals': normals,
+        'uvs': uvs,
+        'groups': {None: {'material': None, 'triangles': triangles}},
+        'materials': {}
+    }
+
+
+def read_stl_file(source, log=print):
+    """
+    Read a binary STL file.
+
+    STL repeats every corner position in each facet; identical positions are
+    merged while reading so welding starts from a shared vertex list. Facet
+    normals are kept unless they are zero, in which case the converter
+    computes them from the positions.
+    """
+    filename = source_name(source)
+    log(f"Reading STL file: {filename}")
+
+    data = read_source_bytes(source)
+
+    if len(data) < STL_HEADER_SIZE + 4:
+        raise ValueError(f"{filename} is too short to be a binary STL file")
+
+    view = memoryview(data)
+    (facet_count,) = struct.unpack_from('<I', view, STL_HEADER_SIZE)
+    body_start = STL_HEADER_SIZE + 4
+    body_end = body_start + facet_count * STL_RECORD.size
+    if body_end > len(data):
+        raise ValueError(f"{filename} is not a binary STL file (ASCII STL is not supported)")
+
+    position_index = {}  # (x, y, z) -> vertex index, in first-seen order
+    add_position = position_index.setdefault
+    normals = []
+    triangles = []
+
+    for record in STL_RECORD.iter_unpack(view[body_start:body_end]):
+        i0 = add_position(record[3:6], len(position_index))
+        i1 = add_position(record[6:9], len(position_index))
+        i2 = add_position(record[9:12], len(position_index))
+
+        if record[0] or record[1] or record[2]:
+            normal_idx = len(normals)
+            normals.append(record[0:3])
+        else:
+            normal_idx = None
+
+        triangles.append(((i0, None, normal_idx), (i1, None, normal_idx), (i2, None, normal_idx)))
+
+    vertices = list(position_index)
+    log(f"Loaded: {len(vertices)} vertices, {len(normals)} normals, 0 UVs, {len(triangles)} faces")
+
+    return _mesh(vertices, normals, [], triangles)
+
+
+def _parse_ply_header(data, filename):
+    """
+    Parse a PLY header.
+
+    Returns:
+        (elements, body_offset) where elements is a list of
+        {'name', 'count', 'properties'} dicts in file order and each property is
+        (name, scalar_format) or (name, count_format, item_format) for lists
+    """
+    header_end = data.find(b'end_header')
+    if not data.startswith(b'ply') or header_end < 0:
+        raise ValueError(f"{filename} is not a PLY file")
+
+    body_offset = data.index(b'\n', header_end) + 1
+    lines = data[:header_end].decode('ascii').splitlines()
+
+    elements = []
+    for line in lines[1:]:
+        parts = line.split()
+        if not parts:
+            continue
+
+        command = parts[0]
+        if command == 'format':
+            if parts[1] != 'binary_little_endian':
+                raise ValueError(f"{filename}: only binary_little_endian PLY is supported (got {parts[1]})")
+        elif command == 'element':
+            elements.append({'name': parts[1], 'count': int(parts[2]), 'properties': []})
+        elif command == 'property':
+            if parts[1] == 'list':
+                elements[-1]['properties'].append((parts[4], PLY_TYPES[parts[2]], PLY_TYPES[parts[3]]))
+            else:
+                elements[-1]['properties'].append((parts[2], PLY_TYPES[parts[1]]))
+
+    return elements, body_offset
+
+
+def _read_ply_columns(view, offset, element):
+    """
+    Decode a PLY element made only of scalar properties, one column per property.
+
+    When every property has the same type the block is read in bulk with
+    array.frombytes and split into columns by slicing; mixed types fall back
+    to struct.iter_unpack.
+
+    Returns:
+        (columns, new_offset) where columns maps property name to a sequence
+    """
+    properties = element['properties']
+    formats = [prop[1] for prop in properties]
+    record_size = struct.calcsize('<' + ''.join(formats))
+    end = offset + element['count'] * record_size
+    names = [prop[0] for prop in properties]
+
+    if len(set(formats)) == 1 and array(formats[0]).itemsize == struct.calcsize('<' + formats[0]):
+        values = array(formats[0])
+        values.frombytes(view[offset:end])
+        if sys.byteorder != 'little':
+            values.byteswap()
+        stride = len(properties)
+        return {name: values[column::stride] for column, name in enumerate(names)}, end
+
+    records = struct.Struct('<' + ''.join(formats)).iter_unpack(view[offset:end])
+    return dict(zip(names, zip(*records))), end
+
+
+def _read_ply_element(view, offset, element):
+    """
+    Decode all records of one PLY element starting at offset.
+
+    Returns:
+        (records, new_offset) where each record is a tuple with one entry per
+        property (list properties become tuples)
+    """
+    properties = element['properties']
+    count = element['count']
+
+    # A lone index list is almost always all triangles; try that layout first
+    if len(properties) == 1:
+        _, count_format, item_format = properties[0]
+        record = struct.Struct('<' + count_format + '3' + item_format)
+        end = offset + count * record.size
+        if end <= len(view):
+            records = list(record.iter_unpack(view[offset:end]))
+            if all(r[0] == 3 for r in records):
+                return [(r[1:],) for r in records], end
+
+    records = []
+    for _ in range(count):
+        values = []
+        for prop in properties:
+            if len(prop) == 2:
+                (value,) = struct.unpack_from('<' + prop[1], view, offset)
+                offset += struct.calcsize(prop[1])
+            else:
+                (length,) = struct.unpack_from('<' + prop[1], view, offset)
+                offset += struct.calcsize(prop[1])
+                item_format = '<' + str(length) + prop[2]
+                value = struct.unpack_from(item_format, view, offset)
+                offset += struct.calcsize(item_format)
+            values.append(value)
+        records.append(tuple(values))
+    return records, offset
+
+
+def read_ply_file(source, log=print):
+    """
+    Read a binary little-endian PLY file.
+
+    Per-vertex normals and UVs are used when the vertex element provides
+    them (nx/ny/nz and u/v, s/t or texture_u/texture_v).
+    """
+    filename = source_name(source)
+    log(f"Reading PLY file: {filename}")
+
+    data = read_source_bytes(source)
+
+    elements, offset = _parse_ply_header(data, filename)
+    view = memoryview(data)
+
+    vertices = []
+    normals = []
+    uvs = []
+    triangles = []
+    face_count = 0
+
+    for element in elements:
+        if all(len(prop) == 2 for prop in element['properties']):
+            columns, offset = _read_ply_columns(view, offset, element)
+            if element['name'] != 'vertex':
+                continue
+
+            vertices = list(zip(columns['x'], columns['y'], columns['z']))
+            if 'nx' in columns and 'ny' in columns and 'nz' in columns:
+                normals = list(zip(columns['nx'], columns['ny'], columns['nz']))
+
+            u_name = next((name for name in PLY_U_NAMES if name in columns), None)
+            v_name = next((name for name in PLY_V_NAMES if name in columns), None)
+            if u_name and v_name:
+                uvs = list(zip(columns[u_name], columns[v_name]))
+            continue
+
+        records, offset = _read_ply_element(view, offset, element)
+        if element['name'] != 'face':
+            continue
+
+        names = [prop[0] for prop in element['properties']]
+        index_name = 'vertex_indices' if 'vertex_indices' in names else 'vertex_index'
+        column = names.index(index_name)
+
+        # One shared corner tuple per vertex; normals and UVs are per vertex in PLY
+        corners = [(i, i if uvs else None, i if normals else None) for i in range(len(vertices))]
+        face_count += len(records)
+        for r in records:
+            indices = r[column]
+            if len(indices) == 3:
+                triangles.append((corners[indices[0]], corners[indices[1]], corners[indices[2]]))
+                continue
+            first = corners[indices[0]]
+            for k in range(1, len(indices) - 1):
+                triangles.append((first, corners[indices[k]], corners[indices[k + 1]]))
+
+    log(f"Loaded: {len(vertices)} vertices, {len(normals)} normals, {len(uvs)} UVs, {face_count} faces")
+
+    return _mesh(vertices, normals, uvs, triangles)
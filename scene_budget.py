@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Render-budget analysis for converted scenes.
+
+Reads converter output (one or more JSON files, per-set or material-table
+form, concatenated the same way Models.loadTriangles does) and reports what
+the scene costs to draw: triangles and vertices per object type and per
+spatial region, draw calls, textures and GPU bytes per vertex attribute.
+Byte counts mirror the buffers Models.processTriangles builds (every
+material attribute is expanded per vertex; indices switch to Uint32 past
+65535 vertices).
+
+Regions divide the battlefield (the ground's XZ bounds, as used by the
+heightfield and PVS) into a fixed grid, so a region means the same patch of
+field from one art drop to the next.
+
+With a budget file the command exits non-zero when any limit is exceeded, so
+it can gate a build. Budget file format (all keys optional):
+
+{
+  "triangles": 150000,
+  "vertices": 120000,
+  "drawCalls": 32,
+  "textures": 12,
+  "gpuBytes": 16000000,
+  "perType": {"enemy_tank_1": {"triangles": 12000}},
+  "perRegion": {"triangles": 60000}
+}
+
+`perRegion` limits apply to every region of the XZ grid. A set is split
+across the regions its triangles fall in and counts one draw call in each.
+"""
+
+import argparse
+import json
+import math
+import sys
+
+from materials import expand_materials
+from scene_pvs import battlefield_bounds
+
+
+# Bytes per vertex of each buffer built by Models.processTriangles
+ATTRIBUTE_SIZES = {
+    'position': 3 * 4,
+    'normal': 3 * 4,
+    'uv': 2 * 4,
+    'diffuse': 3 * 4,
+    'ambient': 3 * 4,
+    'specular': 3 * 4,
+    'n': 4,
+    'alpha': 4
+}
+
+UINT16_INDEX_LIMIT = 65535
+TOTAL_METRICS = ('triangles', 'vertices', 'drawCalls', 'textures', 'gpuBytes')
+GROUP_METRICS = ('triangles', 'vertices', 'drawCalls')
+
+
+def load_scene(json_filenames):
+    """Load and concatenate triangle sets from converter output files."""
+    output = []
+    for json_filename in json_filenames:
+        with open(json_filename, 'r') as f:
+            output.extend(expand_materials(json.load(f)))
+    return output
+
+
+def set_type(obj):
+    """Object type as the converters/Models.js see it: explicit type, else texture name."""
+    if obj.get('type'):
+        return obj['type']
+    texture = obj['material'].get('texture')
+    if texture:
+        return texture.rsplit('.', 1)[0]
+    return 'generic'
+
+
+def _empty_group():
+    return {'triangles': 0, 'vertices': 0, 'drawCalls': 0}
+
+
+def analyze_scene(output, regions=4):
+    """
+    Compute render metrics for a list of triangle sets.
+
+    Args:
+        output: Triangle sets as produced by convert_obj_to_json
+        regions: Number of regions along X and Z over the battlefield bounds
+            (all vertices when the scene has no ground); triangles go to the
+            region holding their centroid, vertices to the region holding them
+            and each set counts a draw call in every region it touches
+
+    Returns:
+        Report dict with 'totals', 'bytes', 'perType' and 'perRegion' entries
+    """
+    if regions < 1:
+        raise ValueError(f"regions must be at least 1 (got {regions})")
+
+    drawn = [obj for obj in output if obj['vertices']]
+
+    total_vertices = sum(len(obj['vertices']) for obj in drawn)
+    total_triangles = sum(len(obj['triangles']) for obj in drawn)
+    textures = {obj['material'].get('texture') for obj in drawn}
+    textures.discard(None)
+
+    bytes_per_attribute = {name: size * total_vertices for name, size in ATTRIBUTE_SIZES.items()}
+    index_size = 4 if total_vertices > UINT16_INDEX_LIMIT else 2
+    bytes_per_attribute['index'] = 3 * index_size * total_triangles
+
+    per_type = {}
+    for obj in drawn:
+        group = per_type.setdefault(set_type(obj), _empty_group())
+        group['triangles'] += len(obj['triangles'])
+        group['vertices'] += len(obj['vertices'])
+        group['drawCalls'] += 1
+
+    per_region = {}
+    if drawn:
+        bounds = battlefield_bounds(drawn) or (
+            min(v[0] for obj in drawn for v in obj['vertices']),
+            max(v[0] for obj in drawn for v in obj['vertices']),
+            min(v[2] for obj in drawn for v in obj['vertices']),
+            max(v[2] for obj in drawn for v in obj['vertices'])
+        )
+        min_x, max_x, min_z, max_z = bounds
+        size_x = (max_x - min_x) / regions or 1.0
+        size_z = (max_z - min_z) / regions or 1.0
+
+        def region_group(x, z):
+            col = min(regions - 1, max(0, int(math.floor((x - min_x) / size_x))))
+            row = min(regions - 1, max(0, int(math.floor((z - min_z) / size_z))))
+            return per_region.setdefault(f"{col},{row}", _empty_group())
+
+        for obj in drawn:
+            positions = obj['vertices']
+            touched = {}
+            for tri in obj['triangles']:
+                p0, p1, p2 = positions[tri[0]], positions[tri[1]], positions[tri[2]]
+                group = region_group((p0[0] + p1[0] + p2[0]) / 3.0, (p0[2] + p1[2] + p2[2]) / 3.0)
+                group['triangles'] += 1
+                touched[id(group)] = group
+            for position in positions:
+                group = region_group(position[0], position[2])
+                group['vertices'] += 1
+                touched[id(group)] = group
+            for group in touched.values():
+                group['drawCalls'] += 1
+
+    return {
+        'totals': {
+            'triangles': total_triangles,
+            'vertices': total_vertices,
+            'drawCalls': len(drawn),
+            'textures': len(textures),
+            'gpuBytes': sum(bytes_per_attribute.values())
+        },
+        'bytes': bytes_per_attribute,
+        'perType': per_type,
+        'perRegion': per_region
+    }
+
+
+def positive_int(value):
+    """argparse type for counts that must be at least 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1 (got {number})")
+    return number
+
+
+def check_budgets(report, budgets):
+    """
+    Compare a report against budget limits.
+
+    Returns:
+        List of human-readable violation messages (empty when within budget)
+    """
+    violations = []
+
+    for metric in TOTAL_METRICS:
+        limit = budgets.get(metric)
+        if limit is not None and report['totals'][metric] > limit:
+            violations.append(f"scene {metric}: {report['totals'][metric]} > {limit}")
+
+    for type_name, limits in budgets.get('perType', {}).items():
+        group = report['perType'].get(type_name)
+        if group is None:
+            continue
+        for metric in GROUP_METRICS:
+            limit = limits.get(metric)
+            if limit is not None and group[metric] > limit:
+                violations.append(f"type {type_name} {metric}: {group[metric]} > {limit}")
+
+    region_limits = budgets.get('perRegion', {})
+    for region, group in sorted(report['perRegion'].items()):
+        for metric in GROUP_METRICS:
+            limit = region_limits.get(metric)
+            if limit is not None and group[metric] > limit:
+                violations.append(f"region {region} {metric}: {group[metric]} > {limit}")
+
+    return violations
+
+
+def print_report(report):
+    totals = report['totals']
+    print("Render budget report:")
+    print(f"  Triangles: {totals['triangles']}")
+    print(f"  Vertices: {totals['vertices']}")
+    print(f"  Draw calls: {totals['drawCalls']}")
+    print(f"  Textures: {totals['textures']}")
+    print(f"  GPU bytes: {totals['gpuBytes']}")
+    for name, size in report['bytes'].items():
+        print(f"    {name}: {size}")
+
+    print("  Per type:")
+    for type_name, group in sorted(report['perType'].items(), key=lambda item: -item[1]['triangles']):
+        print(f"    {type_name}: {group['triangles']} triangles, {group['vertices']} vertices, "
+              f"{group['drawCalls']} draw calls")
+
+    print("  Per region (col,row on XZ):")
+    for region, group in sorted(report['perRegion'].items()):
+        print(f"    {region}: {group['triangles']} triangles, {group['vertices']} vertices, "
+              f"{group['drawCalls']} draw calls")
+
+
+def run_budget_gate(output, budget_filename=None, regions=4):
+    """
+    Print the report for output and check it against a budget file.
+
+    Returns:
+        Process exit code: 1 if any budget is exceeded, otherwise 0
+    """
+    report = analyze_scene(output, regions)
+    print_report(report)
+
+    if not budget_filename:
+        return 0
+
+    with open(budget_filename, 'r') as f:
+        budgets = json.load(f)
+
+    violations = check_budgets(report, budgets)
+    if violations:
+        print(f"\nRender budget exceeded ({budget_filename}):")
+        for violation in violations:
+            print(f"  {violation}")
+        return 1
+
+    print(f"\nWithin render budget ({budget_filename})")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render-budget analyzer for converted scenes")
+    parser.add_argument("json_files", nargs="+", metavar="JSON", help="converter output file(s)")
+    parser.add_argument("--budget", metavar="PATH", help="budget JSON; exit with status 1 when exceeded")
+    parser.add_argument("--regions", type=positive_int, default=4, help="regions along X and Z (default 4)")
+    args = parser.parse_args()
+
+    sys.exit(run_budget_gate(load_scene(args.json_files), args.budget, args.regions))
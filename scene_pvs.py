@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Potentially-visible-set (PVS) precomputation for static scenes.
+
+The battlefield XZ bounds are divided into a grid of cells. For every pair of
+cells, segments are cast between sample points of the two cells; if any
+segment misses all static occluders the cells can see each other. Cells
+always see themselves and their direct neighbours, which keeps the table
+conservative where sampling is coarsest.
+
+Occluders are the houses, buildings and walls. Mountains are left out:
+Models.updateMountainsTranslation moves them with the camera, so they are a
+backdrop rather than static geometry.
+
+Target points run from the ground up to the top of the occluders in or next
+to the target cell. Tanks, bullets and other movable sets do not affect the
+heights, and only static sets (occluders and ground) get a cell span.
+
+The table is a bitset with one row per cell: bit (j % 8) of byte
+(i * rowBytes + j // 8) is set when cell i can see cell j. Cell index is
+row * cols + col, with rows along Z and columns along X.
+"""
+
+import math
+
+
+OCCLUDER_TYPES = ('house', 'wall')
+OCCLUDER_TYPE_PREFIXES = ('building_',)
+GROUND_TYPE = 'ground'
+GROUND_TEXTURE = 'ground.png'
+CHUNK_SIZE = 32  # triangles per bounding box in the occluder hierarchy
+RAY_EPSILON = 1e-7
+
+
+def is_occluder(obj_output):
+    object_type = obj_output.get('type') or ''
+    return object_type in OCCLUDER_TYPES or object_type.startswith(OCCLUDER_TYPE_PREFIXES)
+
+
+def is_ground(obj_output):
+    """Match the ground detection used by Models.js."""
+    return obj_output.get('type') == GROUND_TYPE or obj_output['material'].get('texture') == GROUND_TEXTURE
+
+
+def is_static(obj_output):
+    return is_occluder(obj_output) or is_ground(obj_output)
+
+
+def battlefield_bounds(output):
+    """
+    XZ bounds of the ground sets.
+
+    Mountains do not count: Models.updateMountainsTranslation moves them with
+    the camera, so their exported positions are not world positions.
+
+    Returns:
+        (min_x, max_x, min_z, max_z), or None if the scene has no ground
+    """
+    bounds_sets = [obj for obj in output if is_ground(obj) and obj['vertices']]
+    if not bounds_sets:
+        return None
+
+    return (
+        min(v[0] for obj in bounds_sets for v in obj['vertices']),
+        max(v[0] for obj in bounds_sets for v in obj['vertices']),
+        min(v[2] for obj in bounds_sets for v in obj['vertices']),
+        max(v[2] for obj in bounds_sets for v in obj['vertices'])
+    )
+
+
+def _bounds(points):
+    return (
+        [min(p[0] for p in points), min(p[1] for p in points), min(p[2] for p in points)],
+        [max(p[0] for p in points), max(p[1] for p in points), max(p[2] for p in points)]
+    )
+
+
+def build_occluder_chunks(output):
+    """
+    Group occluder triangles into small chunks with bounding boxes.
+
+    Triangles of each occluder set are sorted along the set's longest axis
+    and split into CHUNK_SIZE groups, giving a one-level hierarchy that lets
+    most segments skip most triangles after a box test.
+
+    Returns:
+        List of (box_min, box_max, triangles) where triangles is a list of
+        (p0, p1, p2) position triples
+    """
+    chunks = []
+    for obj in output:
+        if not is_occluder(obj) or not obj['triangles']:
+            continue
+
+        positions = obj['vertices']
+        triangles = [(positions[t[0]], positions[t[1]], positions[t[2]]) for t in obj['triangles']]
+        set_min, set_max = _bounds(positions)
+        axis = max(range(3), key=lambda a: set_max[a] - set_min[a])
+        triangles.sort(key=lambda tri: tri[0][axis] + tri[1][axis] + tri[2][axis])
+
+        for start in range(0, len(triangles), CHUNK_SIZE):
+            chunk = triangles[start:start + CHUNK_SIZE]
+            box_min, box_max = _bounds([p for tri in chunk for p in tri])
+            chunks.append((box_min, box_max, chunk))
+    return chunks
+
+
+def _segment_hits_box(origin, direction, box_min, box_max):
+    """Slab test for the segment origin + t * direction, t in [0, 1]."""
+    t_near = 0.0
+    t_far = 1.0
+    for axis in range(3):
+        d = direction[axis]
+        if abs(d) < RAY_EPSILON:
+            if origin[axis] < box_min[axis] or origin[axis] > box_max[axis]:
+                return False
+            continue
+        t0 = (box_min[axis] - origin[axis]) / d
+        t1 = (box_max[axis] - origin[axis]) / d
+        if t0 > t1:
+            t0, t1 = t1, t0
+        t_near = max(t_near, t0)
+        t_far = min(t_far, t1)
+        if t_near > t_far:
+            return False
+    return True
+
+
+def _segment_hits_triangle(origin, direction, p0, p1, p2):
+    """Moller-Trumbore intersection restricted to the open segment (0, 1)."""
+    e1x, e1y, e1z = p1[0] - p0[0], p1[1] - p0[1], p1[2] - p0[2]
+    e2x, e2y, e2z = p2[0] - p0[0], p2[1] - p0[1], p2[2] - p0[2]
+    dx, dy, dz = direction
+    hx = dy * e2z - dz * e2y
+    hy = dz * e2x - dx * e2z
+    hz = dx * e2y - dy * e2x
+    det = e1x * hx + e1y * hy + e1z * hz
+    if abs(det) < RAY_EPSILON * RAY_EPSILON:
+        return False
+    inv_det = 1.0 / det
+    sx, sy, sz = origin[0] - p0[0], origin[1] - p0[1], origin[2] - p0[2]
+    u = (sx * hx + sy * hy + sz * hz) * inv_det
+    if u < 0.0 or u > 1.0:
+        return False
+    qx = sy * e1z - sz * e1y
+    qy = sz * e1x - sx * e1z
+    qz = sx * e1y - sy * e1x
+    v = (dx * qx + dy * qy + dz * qz) * inv_det
+    if v < 0.0 or u + v > 1.0:
+        return False
+    t = (e2x * qx + e2y * qy + e2z * qz) * inv_det
+    return RAY_EPSILON < t < 1.0 - RAY_EPSILON
+
+
+def segment_blocked(start, end, chunks):
+    direction = (end[0] - start[0], end[1] - start[1], end[2] - start[2])
+    for box_min, box_max, triangles in chunks:
+        if not _segment_hits_box(start, direction, box_min, box_max):
+            continue
+        for p0, p1, p2 in triangles:
+            if _segment_hits_triangle(start, direction, p0, p1, p2):
+                return True
+    return False
+
+
+def compute_pvs(output, bounds, cells=8, samples=3, eye_height=0.0):
+    """
+    Compute cell-to-cell visibility for the static occluders in output.
+
+    Args:
+        output: Triangle sets as produced by convert_obj_to_json
+        bounds: (min_x, max_x, min_z, max_z) battlefield bounds to divide
+        cells: Number of cells along the longer horizontal axis
+        samples: Sample points per cell along X and Z
+        eye_height: World Y of the viewer (Camera.Eye[1])
+
+    Returns:
+        (bits, info) where bits is the bitset bytearray and info is the grid
+        metadata, including each static set's [minCol, minRow, maxCol, maxRow]
+        span (None for movable sets, which must not be culled by the table)
+    """
+    min_x, max_x, min_z, max_z = bounds
+    cell_size = max(max_x - min_x, max_z - min_z) / cells
+    cols = max(1, int(math.ceil((max_x - min_x) / cell_size - 1e-9)))
+    rows = max(1, int(math.ceil((max_z - min_z) / cell_size - 1e-9)))
+    cell_count = cols * rows
+    row_bytes = (cell_count + 7) // 8
+
+    chunks = build_occluder_chunks(output)
+
+    def cell_range(low, high, origin, count):
+        return (min(count - 1, max(0, int(math.floor((low - origin) / cell_size)))),
+                min(count - 1, max(0, int(math.floor((high - origin) / cell_size)))))
+
+    # Targets are sampled from the ground up to the top of the occluders in or
+    # next to the cell, so tall buildings behind low ones stay visible.
+    # Movable sets (tanks, bullets parked off the field) must not stretch this.
+    ground = [obj for obj in output if is_ground(obj) and obj['vertices']]
+    floor_y = min((v[1] for obj in ground for v in obj['vertices']), default=eye_height)
+
+    cell_tops = [floor_y] * cell_count
+    for box_min, box_max, _ in chunks:
+        col_lo, col_hi = cell_range(box_min[0], box_max[0], min_x, cols)
+        row_lo, row_hi = cell_range(box_min[2], box_max[2], min_z, rows)
+        for row in range(max(0, row_lo - 1), min(rows - 1, row_hi + 1) + 1):
+            for col in range(max(0, col_lo - 1), min(cols - 1, col_hi + 1) + 1):
+                index = row * cols + col
+                cell_tops[index] = max(cell_tops[index], box_max[1])
+
+    def target_heights(index):
+        heights = {floor_y + RAY_EPSILON, eye_height}
+        if cell_tops[index] > floor_y:
+            heights.add(cell_tops[index] - RAY_EPSILON)
+        return sorted(heights)
+
+    def cell_samples(index, heights):
+        col, row = index % cols, index // cols
+        points = []
+        for sx in range(samples):
+            x = min_x + (col + (sx + 0.5) / samples) * cell_size
+            for sz in range(samples):
+                z = min_z + (row + (sz + 0.5) / samples) * cell_size
+                for y in heights:
+                    points.append((x, y, z))
+        return points
+
+    eye_samples = [cell_samples(i, [eye_height]) for i in range(cell_count)]
+    target_samples = [cell_samples(i, target_heights(i)) for i in range(cell_count)]
+
+    bits = bytearray(cell_count * row_bytes)
+
+    def mark(i, j):
+        bits[i * row_bytes + j // 8] |= 1 << (j % 8)
+
+    for i in range(cell_count):
+        col_i, row_i = i % cols, i // cols
+        for j in range(i, cell_count):
+            col_j, row_j = j % cols, j // cols
+            visible = abs(col_i - col_j) <= 1 and abs(row_i - row_j) <= 1
+            if not visible:
+                visible = any(
+                    not segment_blocked(start, end, chunks)
+                    for start in eye_samples[i] for end in target_samples[j]
+                ) or any(
+                    not segment_blocked(start, end, chunks)
+                    for start in eye_samples[j] for end in target_samples[i]
+                )
+            if visible:
+                mark(i, j)
+                mark(j, i)
+
+    set_cells = []
+    for obj in output:
+        if not obj['vertices'] or not is_static(obj):
+            set_cells.append(None)
+            continue
+        set_min, set_max = _bounds(obj['vertices'])
+        col_lo, col_hi = cell_range(set_min[0], set_max[0], min_x, cols)
+        row_lo, row_hi = cell_range(set_min[2], set_max[2], min_z, rows)
+        set_cells.append([col_lo, row_lo, col_hi, row_hi])
+
+    visible_pairs = sum(bin(byte).count('1') for byte in bits)
+    info = {
+        "cols": cols,
+        "rows": rows,
+        "origin": [min_x, min_z],
+        "cellSize": cell_size,
+        "rowBytes": row_bytes,
+        "visibleFraction": visible_pairs / float(cell_count * cell_count),
+        "setCells": set_cells
+    }
+    return bits, info
@@ -4,6 +4,7 @@ Convert scene.obj file to triangles.json format "as is".
 
 This script converts OBJ data directly to JSON without coordinate system transformations.
 It relies on the OBJ file already having the desired coordinate system (e.g. from Blender export settings).
+The conversion itself is the shared engine in mesh_converter.py run with SCENE_PROFILE.
 
 Output JSON structure:
 [
@@ -14,352 +15,261 @@ Output JSON structure:
     "triangles": [...]
   }
 ]
+
+With --heightfield RESOLUTION the ground sets are also rasterized into
+<name>.heightfield.bin / <name>.heightfield.json for O(1) height lookups.
+With --pvs CELLS a cell-to-cell visibility table against the static houses,
+buildings and walls is written to <name>.pvs.bin / <name>.pvs.json.
 """
 
+import argparse
 import json
 import os
-from collections import defaultdict
+import sys
+from array import array
 import math
 
-def parse_mtl_file(mtl_filename):
+import mesh_converter
+from asset_manifest import update_manifest, write_asset
+from mesh_cleanup import print_cleanup_stats
+from mesh_converter import SCENE_PROFILE
+from scene_budget import run_budget_gate
+from scene_pvs import battlefield_bounds, compute_pvs, is_ground
+
+
+def read_obj_file(source, mtl_source=None, log=print):
     """
-    Parse MTL (material) file and extract material properties
+    Read OBJ file with coordinates as is, grouped by object
+
+    source and mtl_source may be paths, bytes or file-like objects. An explicit
+    mtl_source overrides the `mtllib` lookup, which only works for paths.
+    See mesh_converter.read_obj for the returned structure.
     """
-    materials = {}
-    current_material = None
-    
-    if not os.path.exists(mtl_filename):
-        print(f"Warning: Material file {mtl_filename} not found")
-        return materials
-    
-    print(f"Reading material file: {mtl_filename}")
-    
-    with open(mtl_filename, 'r') as f:
-        for line in f:
-            line = line.strip()
-            
-            if not line or line.startswith('#'):
-                continue
-            
-            parts = line.split()
-            if not parts:
+    return mesh_converter.read_obj(source, SCENE_PROFILE, mtl_source, log)
+
+
+def check_heightfield_resolution(resolution):
+    """Raise ValueError unless resolution gives at least two samples per axis."""
+    if resolution < 2:
+        raise ValueError(f"heightfield resolution must be at least 2 (got {resolution})")
+
+
+def rasterize_heightfield(output, resolution):
+    """
+    Rasterize the ground triangle sets into a regular height grid.
+
+    The grid spans the XZ bounds of the ground sets (the battlefield bounds used
+    by Models.js). Samples are laid out row-major with rows along Z and columns
+    along X; sample (col, row) sits at world X = origin[0] + col * cellSize,
+    Z = origin[1] + row * cellSize. Each sample holds the highest ground surface
+    above it; samples no triangle covers take the lowest ground height.
+
+    Mountains are left out: Models.updateMountainsTranslation keeps them at a
+    fixed offset from the camera, so a world-space grid cannot describe them.
+
+    Args:
+        output: Triangle sets as produced by convert_obj_to_json
+        resolution: Number of samples along the longer horizontal axis
+
+    Returns:
+        (heights, info) where heights is an array('f') of rows * cols floats and
+        info is the grid metadata dict, or None if the scene has no ground
+
+    Raises:
+        ValueError: if resolution is less than 2
+    """
+    check_heightfield_resolution(resolution)
+
+    bounds = battlefield_bounds(output)
+    if bounds is None:
+        return None
+
+    ground_sets = [obj for obj in output if is_ground(obj) and obj['vertices']]
+    min_x, max_x, min_z, max_z = bounds
+    floor_height = min(v[1] for obj in ground_sets for v in obj['vertices'])
+
+    cell_size = max(max_x - min_x, max_z - min_z) / (resolution - 1)
+    if cell_size <= 0:
+        return None
+    cols = int(math.floor((max_x - min_x) / cell_size + 1e-9)) + 1
+    rows = int(math.floor((max_z - min_z) / cell_size + 1e-9)) + 1
+
+    heights = array('f', [floor_height]) * (rows * cols)
+    covered = bytearray(rows * cols)
+
+    for obj in ground_sets:
+        positions = obj['vertices']
+        for tri in obj['triangles']:
+            x0, y0, z0 = positions[tri[0]]
+            x1, y1, z1 = positions[tri[1]]
+            x2, y2, z2 = positions[tri[2]]
+
+            # Barycentric setup in the XZ plane; vertical faces have no area there
+            denom = (z1 - z2) * (x0 - x2) + (x2 - x1) * (z0 - z2)
+            if abs(denom) < 1e-12:
                 continue
-            
-            command = parts[0]
-            
-            if command == 'newmtl':
-                current_material = parts[1]
-                materials[current_material] = {
-                    'ambient': [0.2, 0.2, 0.2],
-                    'diffuse': [0.8, 0.8, 0.8],
-                    'specular': [0.0, 0.0, 0.0],
-                    'n': 1,
-                    'alpha': 1.0,
-                    'texture': None
-                }
-            
-            elif current_material:
-                if command == 'Ka':
-                    materials[current_material]['ambient'] = [float(parts[1]), float(parts[2]), float(parts[3])]
-                elif command == 'Kd':
-                    materials[current_material]['diffuse'] = [float(parts[1]), float(parts[2]), float(parts[3])]
-                elif command == 'Ks':
-                    materials[current_material]['specular'] = [float(parts[1]), float(parts[2]), float(parts[3])]
-                elif command == 'Ns':
-                    materials[current_material]['n'] = float(parts[1])
-                elif command in ['map_Kd', 'map_Ka', 'map_d']:
-                    materials[current_material]['texture'] = ' '.join(parts[1:])
-                elif command == 'd':
-                    materials[current_material]['alpha'] = float(parts[1])
-                elif command == 'Tr':
-                    materials[current_material]['alpha'] = 1.0 - float(parts[1])
-    
-    return materials
-
-
-def get_object_texture(object_name):
+
+            col_lo = max(0, int(math.ceil((min(x0, x1, x2) - min_x) / cell_size)))
+            col_hi = min(cols - 1, int(math.floor((max(x0, x1, x2) - min_x) / cell_size)))
+            row_lo = max(0, int(math.ceil((min(z0, z1, z2) - min_z) / cell_size)))
+            row_hi = min(rows - 1, int(math.floor((max(z0, z1, z2) - min_z) / cell_size)))
+
+            for row in range(row_lo, row_hi + 1):
+                z = min_z + row * cell_size
+                for col in range(col_lo, col_hi + 1):
+                    x = min_x + col * cell_size
+                    w0 = ((z1 - z2) * (x - x2) + (x2 - x1) * (z - z2)) / denom
+                    w1 = ((z2 - z0) * (x - x2) + (x0 - x2) * (z - z2)) / denom
+                    w2 = 1.0 - w0 - w1
+                    if w0 < -1e-6 or w1 < -1e-6 or w2 < -1e-6:
+                        continue
+                    y = w0 * y0 + w1 * y1 + w2 * y2
+                    index = row * cols + col
+                    if not covered[index] or y > heights[index]:
+                        heights[index] = y
+                        covered[index] = 1
+
+    info = {
+        "format": "float32le",
+        "cols": cols,
+        "rows": rows,
+        "origin": [min_x, min_z],
+        "cellSize": cell_size,
+        "minHeight": min(heights),
+        "maxHeight": max(heights),
+        "coveredSamples": sum(covered)
+    }
+    return heights, info
+
+
+def write_heightfield(output, json_filename, resolution, hashed=False, manifest_filename=None):
     """
-    Get the texture file for a specific object name.
+    Write the ground heightfield next to the scene JSON.
+
+    Produces <name>.heightfield.bin (raw little-endian float32 samples) and
+    <name>.heightfield.json (grid size and world-space transform).
     """
-    model_type = object_name.split('.')[0]
-    return model_type + '.png'
+    result = rasterize_heightfield(output, resolution)
+    if result is None:
+        print("No ground sets found; skipping heightfield")
+        return None
+    heights, info = result
+
+    base_filename = os.path.splitext(json_filename)[0]
+    bin_filename = base_filename + '.heightfield.bin'
+    info_filename = base_filename + '.heightfield.json'
 
+    if sys.byteorder != 'little':
+        heights.byteswap()
+    print(f"Writing {bin_filename} ({info['cols']} x {info['rows']} samples, cell size {info['cellSize']:.4f})...")
+    bin_entry = write_asset(bin_filename, heights.tobytes(), hashed=hashed)
+    info['file'] = bin_entry['file']
+    info_entry = write_asset(info_filename, json.dumps(info, indent=2).encode('utf-8'), hashed=hashed)
 
-def read_obj_file(filename):
+    if manifest_filename:
+        update_manifest(manifest_filename, os.path.basename(bin_filename), bin_entry)
+        update_manifest(manifest_filename, os.path.basename(info_filename), info_entry)
+
+    return info
+
+
+def write_pvs(output, json_filename, cells, samples=3, hashed=False, manifest_filename=None):
     """
-    Read OBJ file and return vertices, normals, UVs, and faces with object tracking
+    Write the potentially-visible-set table next to the scene JSON.
+
+    Produces <name>.pvs.bin (cell-to-cell visibility bitset, see scene_pvs.py)
+    and <name>.pvs.json (grid transform and per-set cell spans).
     """
-    vertices = []
-    normals = []
-    uvs = []
-    faces = []
-    
-    current_material = None
-    current_object = None
-    materials = {}
-    
-    print(f"Reading OBJ file: {filename}")
-    
-    with open(filename, 'r') as f:
-        for line in f:
-            line = line.strip()
-            
-            if not line or line.startswith('#'):
-                continue
-            
-            parts = line.split()
-            if not parts:
-                continue
-            
-            command = parts[0]
-            
-            if command == 'o':
-                current_object = parts[1] if len(parts) > 1 else None
-            elif command == 'mtllib':
-                mtl_filename = ' '.join(parts[1:])
-                mtl_path = os.path.join(os.path.dirname(filename), mtl_filename)
-                materials = parse_mtl_file(mtl_path)
-            elif command == 'usemtl':
-                current_material = parts[1]
-            elif command == 'v':
-                x, y, z = float(parts[1]), float(parts[2]), float(parts[3])
-                vertices.append([x, y, z])
-            elif command == 'vn':
-                nx, ny, nz = float(parts[1]), float(parts[2]), float(parts[3])
-                normals.append([nx, ny, nz])
-            elif command == 'vt':
-                u, v = float(parts[1]), float(parts[2])
-                uvs.append([u, v])
-            elif command == 'f':
-                face = {
-                    'vertices': [],
-                    'normals': [],
-                    'uvs': [],
-                    'material': current_material,
-                    'object': current_object
-                }
-                for vertex_str in parts[1:]:
-                    indices = vertex_str.split('/')
-                    v_idx = int(indices[0]) - 1
-                    face['vertices'].append(v_idx)
-                    
-                    if len(indices) > 1 and indices[1]:
-                        vt_idx = int(indices[1]) - 1
-                        face['uvs'].append(vt_idx)
-                    else:
-                        face['uvs'].append(None)
-                    
-                    if len(indices) > 2 and indices[2]:
-                        vn_idx = int(indices[2]) - 1
-                        face['normals'].append(vn_idx)
-                    else:
-                        face['normals'].append(None)
-                faces.append(face)
-    
-    print(f"Loaded: {len(vertices)} vertices, {len(normals)} normals, {len(uvs)} UVs, {len(faces)} faces")
-    
-    return {
-        'vertices': vertices,
-        'normals': normals,
-        'uvs': uvs,
-        'faces': faces,
-        'materials': materials
-    }
+    bounds = battlefield_bounds(output)
+    if bounds is None:
+        print("No ground sets found; skipping PVS")
+        return None
+
+    print(f"Computing PVS ({cells} cells along the longer axis, {samples}x{samples} samples per cell)...")
+    bits, info = compute_pvs(output, bounds, cells, samples)
 
+    base_filename = os.path.splitext(json_filename)[0]
+    bin_filename = base_filename + '.pvs.bin'
+    info_filename = base_filename + '.pvs.json'
 
-def triangulate_face(face):
+    print(f"Writing {bin_filename} ({info['cols']} x {info['rows']} cells, "
+          f"{info['visibleFraction'] * 100:.1f}% of cell pairs visible)...")
+    bin_entry = write_asset(bin_filename, bytes(bits), hashed=hashed)
+    info['file'] = bin_entry['file']
+    info_entry = write_asset(info_filename, json.dumps(info, indent=2).encode('utf-8'), hashed=hashed)
+
+    if manifest_filename:
+        update_manifest(manifest_filename, os.path.basename(bin_filename), bin_entry)
+        update_manifest(manifest_filename, os.path.basename(info_filename), info_entry)
+
+    return info
+
+
+def build_triangle_sets(obj_data, default_material=None, clean=True, weld_tolerance=None, log=print):
     """
-    Triangulate a face (convert quads and n-gons to triangles)
+    Build one triangle set per OBJ object from parsed OBJ data, coordinates as is.
+
+    Does no file I/O and reports only through log, so it can run on several
+    threads at once. Returns (output, stats) like obj_to_json.build_triangle_sets.
     """
-    if len(face['vertices']) == 3:
-        return [face]
-    
-    triangles = []
-    for i in range(1, len(face['vertices']) - 1):
-        tri = {
-            'vertices': [face['vertices'][0], face['vertices'][i], face['vertices'][i + 1]],
-            'normals': [face['normals'][0], face['normals'][i], face['normals'][i + 1]],
-            'uvs': [face['uvs'][0], face['uvs'][i], face['uvs'][i + 1]],
-            'material': face['material'],
-            'object': face['object']
-        }
-        triangles.append(tri)
-    
-    return triangles
-
-
-def normalize(vector):
-    length = math.sqrt(vector[0] ** 2 + vector[1] ** 2 + vector[2] ** 2)
-    if length == 0:
-        return [0.0, 0.0, 0.0]
-    return [component / length for component in vector]
-
-
-def compute_face_normal(p0, p1, p2):
-    """Compute normalized face normal for triangle defined by p0, p1, p2."""
-    ux, uy, uz = p1[0] - p0[0], p1[1] - p0[1], p1[2] - p0[2]
-    vx, vy, vz = p2[0] - p0[0], p2[1] - p0[1], p2[2] - p0[2]
-    nx = uy * vz - uz * vy
-    ny = uz * vx - ux * vz
-    nz = ux * vy - uy * vx
-    return normalize([nx, ny, nz])
-
-
-def convert_obj_to_json(obj_filename, json_filename, default_material=None):
-    if default_material is None:
-        default_material = {
-            "ambient": [0.2, 0.2, 0.2],
-            "diffuse": [0.8, 0.8, 0.8],
-            "specular": [0.3, 0.3, 0.3],
-            "n": 11,
-            "alpha": 1.0,
-            "texture": None
-        }
-    
+    return mesh_converter.build_triangle_sets(obj_data, SCENE_PROFILE, default_material, clean,
+                                              weld_tolerance, log)
+
+
+def convert_obj_to_json(obj_filename, json_filename, default_material=None, heightfield_resolution=None,
+                        clean=True, hashed=False, manifest_filename=None, weld_tolerance=None,
+                        pvs_cells=None, pvs_samples=3, material_table=False):
+    if heightfield_resolution is not None:
+        check_heightfield_resolution(heightfield_resolution)
+    manifest_filename = mesh_converter.resolve_manifest(json_filename, hashed, manifest_filename)
+
     # Read OBJ file
     obj_data = read_obj_file(obj_filename)
-    
-    # Use vertices and normals exactly as they appear in the OBJ file
-    print("Using OBJ coordinates 'as is' (assuming correct export settings)...")
-    raw_vertices = obj_data['vertices']
-    raw_normals = [normalize(n) for n in obj_data['normals']]
-    raw_uvs = obj_data['uvs']
-    
-    obj_faces = obj_data['faces']
-    obj_materials = obj_data['materials']
-    
-    scene_min = [float("inf")] * 3
-    scene_max = [float("-inf")] * 3
-    
-    faces_by_object = defaultdict(list)
-    material_by_object = {}
-    
-    for face in obj_faces:
-        triangles = triangulate_face(face)
-        material_name = face['material'] or 'default'
-        object_name = face['object'] or 'unknown'
-        
-        # Group by object only
-        faces_by_object[object_name].extend(triangles)
-        
-        # Store the first material encountered for each object
-        if object_name not in material_by_object:
-            material_by_object[object_name] = material_name
-    
-    print(f"Found {len(faces_by_object)} objects")
-    
-    output = []
-    
-    for object_name, faces in faces_by_object.items():
-        print(f"\nProcessing object: {object_name}")
-        
-        # Use the first material found for this object
-        material_name = material_by_object.get(object_name, 'default')
-        
-        if material_name in obj_materials:
-            material = obj_materials[material_name].copy()
-        else:
-            material = default_material.copy()
-        
-        object_texture = get_object_texture(object_name)
-        if object_texture:
-            material['texture'] = object_texture
-        
-        # Extract type using same logic as get_object_texture
-        object_type = object_name.split('.')[0] if object_name else None
-        
-        vertex_map = {}
-        vertices = []
-        normals = []
-        uvs = []
-        triangles = []
-        
-        set_min = [float("inf")] * 3
-        set_max = [float("-inf")] * 3
-        
-        for face in faces:
-            triangle_indices = []
-            
-            for i in range(3):
-                v_idx = face['vertices'][i]
-                vn_idx = face['normals'][i]
-                position = raw_vertices[v_idx] # Direct access, no transform
-
-                if vn_idx is not None and vn_idx < len(raw_normals):
-                    normal = raw_normals[vn_idx] # Direct access, no transform
-                else:
-                    p0 = raw_vertices[face['vertices'][0]]
-                    p1 = raw_vertices[face['vertices'][1]]
-                    p2 = raw_vertices[face['vertices'][2]]
-                    normal = compute_face_normal(p0, p1, p2)
-
-                vt_idx = face['uvs'][i]
-                if vt_idx is not None and vt_idx < len(raw_uvs):
-                    uv_values = raw_uvs[vt_idx]
-                    # Direct access 'as is', no 1.0 - u flips
-                    uv = [uv_values[0], uv_values[1]]
-                else:
-                    uv = [0.0, 0.0]
-                
-                position_key = tuple(round(c, 6) for c in position)
-                normal_key = tuple(round(c, 6) for c in normal)
-                uv_key = tuple(round(c, 6) for c in uv)
-                key = (position_key, normal_key, uv_key)
-                
-                if key not in vertex_map:
-                    new_idx = len(vertices)
-                    vertex_map[key] = new_idx
-                    
-                    vertices.append(position)
-                    for axis in range(3):
-                        set_min[axis] = min(set_min[axis], position[axis])
-                        set_max[axis] = max(set_max[axis], position[axis])
-                        scene_min[axis] = min(scene_min[axis], position[axis])
-                        scene_max[axis] = max(scene_max[axis], position[axis])
-                    
-                    normals.append(normal)
-                    uvs.append(list(uv))
-                    triangle_indices.append(new_idx)
-                else:
-                    triangle_indices.append(vertex_map[key])
-            
-            triangles.append(triangle_indices)
-        
-        obj_output = {
-            "material": {
-                "ambient": material['ambient'],
-                "diffuse": material['diffuse'],
-                "specular": material['specular'],
-                "n": material['n'],
-                "alpha": material.get('alpha', 1.0),
-                "texture": material.get('texture')
-            },
-            "type": object_type,
-            "vertices": vertices,
-            "normals": normals,
-            "uvs": uvs,
-            "triangles": triangles
-        }
-        output.append(obj_output)
-    
-    print(f"\nWriting {json_filename}...")
-    with open(json_filename, 'w') as f:
-        json.dump(output, f, indent=2)
-    
+    output, stats = build_triangle_sets(obj_data, default_material, clean, weld_tolerance)
+
+    print()
+    if stats['weldSaved'] is not None:
+        print(f"Tolerance welding saved {stats['weldSaved']} vertices vs exact welding")
+    if stats['cleanup'] is not None:
+        print_cleanup_stats(stats['cleanup'], indent="")
+
+    mesh_converter.write_output(output, json_filename, hashed, manifest_filename, material_table)
+
+    if heightfield_resolution is not None:
+        write_heightfield(output, json_filename, heightfield_resolution, hashed, manifest_filename)
+
+    if pvs_cells:
+        write_pvs(output, json_filename, pvs_cells, pvs_samples, hashed, manifest_filename)
+
     print(f"Conversion complete! Coordinates preserved 'as is'.")
 
+    return output
+
+
+def heightfield_resolution(value):
+    """argparse type for --heightfield; a grid needs at least two samples per axis."""
+    resolution = int(value)
+    if resolution < 2:
+        raise argparse.ArgumentTypeError(f"must be at least 2 (got {resolution})")
+    return resolution
+
 
 if __name__ == "__main__":
-    import sys
-    
-    obj_file = "scene.obj"
-    json_file = "scene.json"
-    
-    if len(sys.argv) > 1:
-        obj_file = sys.argv[1]
-    if len(sys.argv) > 2:
-        json_file = sys.argv[2]
-    
+    parser = argparse.ArgumentParser(description="Scene OBJ to JSON Converter (No Axis Transforms)")
+    parser.add_argument("obj_file", nargs="?", default="scene.obj")
+    parser.add_argument("json_file", nargs="?", default="scene.json")
+    parser.add_argument("--heightfield", type=heightfield_resolution, metavar="RESOLUTION",
+                        help="also write a ground heightfield with RESOLUTION samples along the longer axis")
+    parser.add_argument("--pvs", type=int, metavar="CELLS",
+                        help="also write a potentially-visible-set table with CELLS cells along the longer axis")
+    parser.add_argument("--pvs-samples", type=int, default=3, metavar="N",
+                        help="PVS sample points per cell along X and Z (default 3)")
+    mesh_converter.add_converter_arguments(parser)
+    args = parser.parse_args()
+
+    obj_file = args.obj_file
+    json_file = args.json_file
+
     # Default material
     default_material = {
         "ambient": [0.2, 0.2, 0.2],
@@ -369,9 +279,17 @@ if __name__ == "__main__":
         "alpha": 1.0,
         "texture": None
     }
-    
+
     print("Scene OBJ to JSON Converter (No Axis Transforms)")
     print(f"Input: {obj_file}")
     print(f"Output: {json_file}")
-    
-    convert_obj_to_json(obj_file, json_file, default_material)
\ No newline at end of file
+
+    output = convert_obj_to_json(obj_file, json_file, default_material, heightfield_resolution=args.heightfield,
+                                 clean=args.clean, hashed=args.hashed, manifest_filename=args.manifest,
+                                 weld_tolerance=mesh_converter.weld_tolerance_from_args(parser, args),
+                                 material_table=args.material_table,
+                                 pvs_cells=args.pvs, pvs_samples=args.pvs_samples)
+
+    if args.budget:
+        print()
+        sys.exit(run_budget_gate(output, args.budget))
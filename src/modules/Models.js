@@ -106,8 +106,15 @@ const Models = {
     return Promise.all(loadPromises)
       .then(function(results) {
         var inputTriangles = [];
+        var materialOffset = 0;
         results.forEach(function(data) {
           if (data != null) {
+            // Material-table files ({materials, sets}) reference materials by index
+            if (!Array.isArray(data) && data.sets) {
+              data = self.expandMaterialTable(data, materialOffset);
+              materialOffset += data.materialCount;
+              data = data.sets;
+            }
             // Each file returns an array of triangle sets; append them
             inputTriangles = inputTriangles.concat(data);
           }
@@ -121,6 +128,18 @@ const Models = {
       });
   },
   
+  // Resolve material indices of a material-table file back to material objects.
+  // materialId is kept (offset across files) so draws can be sorted by material.
+  expandMaterialTable: function(data, materialOffset) {
+    var sets = data.sets.map(function(set) {
+      var expanded = Object.assign({}, set);
+      expanded.material = data.materials[set.material];
+      expanded.materialId = materialOffset + set.material;
+      return expanded;
+    });
+    return { sets: sets, materialCount: data.materials.length };
+  },
+  
   // Process loaded triangle data
   processTriangles: function(gl, inputTriangles) {
 
@@ -142,7 +161,8 @@ const Models = {
       for (var whichSet = 0; whichSet < inputTriangles.length; whichSet++) {
         var setData = {
           startIdx: totalTriangles * 3,
-          textureName: inputTriangles[whichSet].material.texture
+          textureName: inputTriangles[whichSet].material.texture,
+          materialId: inputTriangles[whichSet].materialId
         };
         var avgPos = [0, 0, 0];
         textureNameArray.push(inputTriangles[whichSet].material.texture);
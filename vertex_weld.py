@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Vertex welding shared by the OBJ converters.
+
+Exact mode merges corners whose position, normal and UV agree after rounding
+to 6 decimals (the converters' original behaviour). Tolerance mode merges a
+corner into an existing vertex when every position, normal and UV component is
+within its own epsilon. Candidates come from a spatial hash grid with a cell
+size of the position epsilon, so only the 27 surrounding cells are searched
+and welding stays near-linear.
+"""
+
+import math
+
+
+EXACT_DECIMALS = 6
+DEFAULT_WELD_EPSILON = 1e-6
+
+
+def _exact_key(position, normal, uv):
+    return (
+        tuple(round(component, EXACT_DECIMALS) for component in position),
+        tuple(round(component, EXACT_DECIMALS) for component in normal),
+        tuple(round(component, EXACT_DECIMALS) for component in uv)
+    )
+
+
+def _within(a, b, epsilon):
+    for component_a, component_b in zip(a, b):
+        if abs(component_a - component_b) > epsilon:
+            return False
+    return True
+
+
+class VertexWelder:
+    """
+    Build a deduplicated vertex pool for one triangle set.
+
+    Args:
+        tolerance: None for exact welding, or (position, normal, uv) epsilons
+    """
+
+    def __init__(self, tolerance=None):
+        self.vertices = []
+        self.normals = []
+        self.uvs = []
+        self.tolerance = tolerance
+        self._exact_map = {}  # exact key -> vertex index
+        self._exact_count = 0  # vertices exact welding would have produced
+        self._grid = {}  # spatial hash cell -> vertex indices
+
+        if tolerance is not None:
+            position_epsilon, normal_epsilon, uv_epsilon = tolerance
+            if not position_epsilon > 0:
+                raise ValueError("Position weld tolerance must be positive")
+            if not normal_epsilon >= 0 or not uv_epsilon >= 0:
+                raise ValueError("Normal and UV weld tolerances must not be negative")
+            self._cell_size = position_epsilon
+
+    def _cell(self, position):
+        size = self._cell_size
+        return (math.floor(position[0] / size), math.floor(position[1] / size), math.floor(position[2] / size))
+
+    def _find_nearby(self, position, normal, uv):
+        position_epsilon, normal_epsilon, uv_epsilon = self.tolerance
+        cx, cy, cz = self._cell(position)
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for dz in (-1, 0, 1):
+                    for idx in self._grid.get((cx + dx, cy + dy, cz + dz), ()):
+                        if _within(self.vertices[idx], position, position_epsilon) and \
+                                _within(self.normals[idx], normal, normal_epsilon) and \
+                                _within(self.uvs[idx], uv, uv_epsilon):
+                            return idx
+        return None
+
+    def add(self, position, normal, uv):
+        """
+        Return (index, is_new) for a corner, adding a vertex if nothing matches.
+        """
+        key = _exact_key(position, normal, uv)
+        idx = self._exact_map.get(key)
+        if idx is not None:
+            return idx, False
+        self._exact_count += 1
+
+        if self.tolerance is not None:
+            idx = self._find_nearby(position, normal, uv)
+            if idx is not None:
+                self._exact_map[key] = idx
+                return idx, False
+
+        idx = len(self.vertices)
+        self._exact_map[key] = idx
+        self.vertices.append(position)
+        self.normals.append(normal)
+        self.uvs.append(list(uv))
+        if self.tolerance is not None:
+            self._grid.setdefault(self._cell(position), []).append(idx)
+        return idx, True
+
+    @property
+    def saved(self):
+        """Vertices saved compared to exact welding."""
+        return self._exact_count - len(self.vertices)